@@ -0,0 +1,76 @@
+"""
+In-process caching primitives
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, CACHE_SIZE_BYTES
+
+
+class TTLCache:
+    """
+    LRU cache bounded by an approximate memory budget, with per-entry expiry.
+
+    Callers pass the size of each value when storing it; least recently used
+    entries are evicted until the total fits in ``max_bytes``. Hits, misses
+    and evictions are exported as Prometheus metrics labelled by ``name``.
+    """
+
+    def __init__(self, name: str, max_bytes: int, ttl_seconds: float):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = CACHE_HITS.labels(cache=name)
+        self._misses = CACHE_MISSES.labels(cache=name)
+        self._expired = CACHE_EVICTIONS.labels(cache=name, reason="expired")
+        self._evicted = CACHE_EVICTIONS.labels(cache=name, reason="size")
+        self._size = CACHE_SIZE_BYTES.labels(cache=name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses.inc()
+                return None
+            value, nbytes, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._expired.inc()
+                self._misses.inc()
+                return None
+            self._entries.move_to_end(key)
+            self._hits.inc()
+            return value
+
+    def set(self, key: Hashable, value: Any, nbytes: int) -> None:
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, nbytes, time.monotonic() + self.ttl_seconds)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evicted.inc()
+            self._size.set(self._bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._size.set(0)
+
+    def _remove(self, key: Hashable) -> None:
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+        self._size.set(self._bytes)
@@ -19,6 +19,8 @@ class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    WORKERS: int = 1
+    PROMETHEUS_MULTIPROC_DIR: str = "/tmp/prometheus-multiproc"
     
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
@@ -29,20 +31,56 @@ class Settings(BaseSettings):
     LOG_FILE_PATH: str = "logs/api.log"
     LOKI_URL: Optional[str] = "http://localhost:3100/loki/api/v1/push"
     LOKI_ENABLED: bool = True
+    LOKI_BATCH_SIZE: int = 500
+    LOKI_FLUSH_INTERVAL_SECONDS: float = 1.0
+    LOKI_MAX_QUEUE_SIZE: int = 10000
+    LOKI_MAX_RETRIES: int = 3
     
     # Monitoring
     METRICS_ENABLED: bool = True
     METRICS_PATH: str = "/metrics"
+    METRICS_CACHE_TTL_SECONDS: float = 1.0  # 0 renders on every scrape
+    METRICS_EXEMPLARS: bool = True
     MONITORING_NAMESPACE: str = "api"
+    TOP_PRODUCTS_K: int = 20
+    TOP_PRODUCTS_CAPACITY: int = 200
+    LATENCY_WINDOW_SECONDS: float = 60
+    LATENCY_WINDOW_SLOTS: int = 6
+    LATENCY_RELATIVE_ACCURACY: float = 0.01
+    LATENCY_SUMMARIES_ENABLED: bool = False
+    REQUEST_LOG_PATH: Optional[str] = None  # e.g. requests.jsonl, written as requests.<pid>.jsonl per worker, for benchmarks/replay.py
     
-    # Database (for future use)
-    DB_URL: Optional[str] = None
+    # Tracing
+    JAEGER_COLLECTOR_ENDPOINT: str = "http://localhost:14268/api/traces"
+    TRACE_SAMPLER: str = "ratio"  # always_on, ratio (parent-based) or rules
+    TRACE_SAMPLE_RATIO: float = 1.0
+    TRACE_SLOW_REQUEST_MS: float = 500
+    TRACE_MAX_QUEUE_SIZE: int = 2048
+    TRACE_MAX_EXPORT_BATCH_SIZE: int = 512
+    TRACE_EXPORT_INTERVAL_MS: int = 5000
+    
+    # Catalog
+    CATALOG_PATH: Optional[str] = None  # NDJSON from app.data.generator; bundled sample if unset
+    COMPACT_CATALOG: bool = True  # slotted records with interned strings and compressed text
+    
+    # Search
+    SEARCH_MAX_OFFSET: int = 10000
+    EXPORT_BATCH_SIZE: int = 500  # products read and sent per chunk of /products/export
+    
+    # Database
+    DB_URL: Optional[str] = None  # sqlite:///catalog.db; in-memory catalog if unset
     DB_MAX_CONNECTIONS: int = 10
     DB_CONNECT_RETRY: int = 3
     
-    # Cache (for future use)
-    CACHE_URL: Optional[str] = None
+    # Cache
+    CACHE_URL: Optional[str] = None  # redis://host:6379/0, fakeredis:// or sqlite:///cache.db
     CACHE_EXPIRY_SECONDS: int = 300
+    CACHE_L1_MAX_BYTES: int = 32 * 1024 * 1024  # per cached kind: search pages, products, facets
+    CACHE_KEY_PREFIX: str = "api"  # change when the catalog changes to start from an empty shared cache
+    CACHE_EARLY_EXPIRY_BETA: float = 1.0  # 0 disables probabilistic early refresh
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    PAYLOAD_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # product JSON reused by list and detail responses
     
     # Security (for future use)
     SECRET_KEY: str = "development_secret_key"
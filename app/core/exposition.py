@@ -0,0 +1,57 @@
+"""
+Cached rendering of the Prometheus exposition for /metrics
+"""
+import gzip
+import time
+from typing import Dict, Tuple
+
+from prometheus_client.exposition import choose_encoder, gzip_accepted
+from starlette.concurrency import run_in_threadpool
+
+from app.core.singleflight import SingleFlight
+
+
+class ExpositionCache:
+    """
+    Renders a registry at most once per ``ttl_seconds`` per content type
+
+    The format is negotiated from ``Accept`` (Prometheus text or OpenMetrics,
+    which carries exemplars) and the body is gzipped when ``Accept-Encoding``
+    allows it. Rendering walks every series, so it runs in the threadpool,
+    and concurrent scrapes of an expired entry share a single render.
+    """
+
+    def __init__(self, registry, ttl_seconds: float):
+        self.registry = registry
+        self.ttl_seconds = ttl_seconds
+        # content type -> (expires_at, body, gzipped body or None)
+        self._entries: Dict[str, Tuple[float, bytes, bytes]] = {}
+        self._flight = SingleFlight("metrics_render")
+
+    def _render(self, encoder, content_type: str, compress: bool) -> Tuple[bytes, bytes]:
+        now = time.monotonic()
+        entry = self._entries.get(content_type)
+        if entry is None or entry[0] <= now:
+            entry = (now + self.ttl_seconds, encoder(self.registry), None)
+        if compress and entry[2] is None:
+            entry = (entry[0], entry[1], gzip.compress(entry[1], compresslevel=6))
+        if self.ttl_seconds > 0:
+            self._entries[content_type] = entry
+        return entry[1], entry[2]
+
+    async def render(self, accept: str, accept_encoding: str) -> Tuple[bytes, str, bool]:
+        """Return ``(body, content_type, gzipped)`` for a scrape request"""
+        encoder, content_type = choose_encoder(accept)
+        compress = gzip_accepted(accept_encoding)
+
+        entry = self._entries.get(content_type)
+        if entry is not None and entry[0] > time.monotonic() and (not compress or entry[2] is not None):
+            body, compressed = entry[1], entry[2]
+        else:
+            body, compressed = await self._flight.do(
+                (content_type, compress),
+                lambda: run_in_threadpool(self._render, encoder, content_type, compress),
+            )
+        if compress:
+            return compressed, content_type, True
+        return body, content_type, False
@@ -0,0 +1,206 @@
+"""
+In-process latency percentiles with bounded relative error
+"""
+import math
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from prometheus_client.core import SummaryMetricFamily
+
+# Quantiles reported by the JSON endpoint and the optional summaries
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99, "p999": 0.999}
+
+# Durations below this are counted as zero (1 ns)
+_MIN_VALUE = 1e-9
+
+
+class DDSketch:
+    """
+    DDSketch quantile sketch (Masson et al.)
+
+    Values fall into logarithmic bins ``gamma**(i-1) < v <= gamma**i`` with
+    ``gamma = (1 + a) / (1 - a)``, so any reported quantile is within a
+    relative error ``a`` of the true value, at 1ms as well as at 10s.
+    Sketches with the same accuracy merge by adding bin counts. When more
+    than ``max_bins`` bins are in use the lowest ones are collapsed, which
+    only affects the accuracy of the fastest values.
+    """
+
+    __slots__ = ("relative_accuracy", "max_bins", "_log_gamma", "_bins",
+                 "zero_count", "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(gamma)
+        self._bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value < _MIN_VALUE:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        bins = self._bins
+        if index in bins:
+            bins[index] += 1
+        else:
+            bins[index] = 1
+            if len(bins) > self.max_bins:
+                self._collapse()
+
+    def _collapse(self) -> None:
+        """Fold the two lowest bins into one"""
+        lowest, second = sorted(self._bins)[:2]
+        self._bins[second] += self._bins.pop(lowest)
+
+    def merge(self, other: "DDSketch") -> None:
+        for index, count in other._bins.items():
+            self._bins[index] = self._bins.get(index, 0) + count
+        while len(self._bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self._bins):
+            seen += self._bins[index]
+            if seen > rank:
+                # Midpoint of the bin in relative terms, clamped to what was seen
+                value = 2 * math.exp(index * self._log_gamma) / (1 + math.exp(self._log_gamma))
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class WindowedSketch:
+    """
+    DDSketch over a sliding time window
+
+    The window is split into ``slots`` sub-sketches that are rotated out as
+    they age, so memory stays bounded and a query reflects the last
+    ``window_seconds`` (give or take one slot).
+    """
+
+    def __init__(self, window_seconds: float, slots: int, relative_accuracy: float):
+        self.slot_seconds = window_seconds / slots
+        self.relative_accuracy = relative_accuracy
+        # Ring of (slot number, sketch)
+        self._slots = [(-1, DDSketch(relative_accuracy)) for _ in range(slots)]
+        self._lock = threading.Lock()
+
+    def _slot(self, now: float) -> DDSketch:
+        number = int(now // self.slot_seconds)
+        position = number % len(self._slots)
+        slot_number, sketch = self._slots[position]
+        if slot_number != number:
+            sketch = DDSketch(self.relative_accuracy)
+            self._slots[position] = (number, sketch)
+        return sketch
+
+    def add(self, value: float) -> None:
+        with self._lock:
+            self._slot(time.monotonic()).add(value)
+
+    def merged(self) -> DDSketch:
+        """One sketch covering the live part of the window"""
+        oldest = int(time.monotonic() // self.slot_seconds) - len(self._slots) + 1
+        total = DDSketch(self.relative_accuracy)
+        with self._lock:
+            for slot_number, sketch in self._slots:
+                if slot_number >= oldest:
+                    total.merge(sketch)
+        return total
+
+
+class LatencyTracker:
+    """
+    Windowed latency sketches keyed by (group, name)
+
+    Groups are e.g. ``route`` (``GET /products/{product_id}``) and ``search``
+    (``simple``/``complex``); callers pass bounded names such as route
+    templates, so the number of sketches stays small.
+    """
+
+    def __init__(self, window_seconds: float = 60, slots: int = 6, relative_accuracy: float = 0.01):
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self.relative_accuracy = relative_accuracy
+        self._sketches: Dict[Tuple[str, str], WindowedSketch] = {}
+        self._lock = threading.Lock()
+
+    def sketch(self, group: str, name: str) -> WindowedSketch:
+        """The sketch for (group, name), created on first use; callers may keep it"""
+        key = (group, name)
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            with self._lock:
+                sketch = self._sketches.setdefault(
+                    key, WindowedSketch(self.window_seconds, self.slots, self.relative_accuracy)
+                )
+        return sketch
+
+    def observe(self, group: str, name: str, seconds: float) -> None:
+        self.sketch(group, name).add(seconds)
+
+    def merged(self) -> Iterable[Tuple[str, str, DDSketch]]:
+        with self._lock:
+            items = list(self._sketches.items())
+        for (group, name), sketch in items:
+            yield group, name, sketch.merged()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Percentiles in milliseconds per group and name over the window"""
+        groups: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for group, name, sketch in self.merged():
+            if sketch.count == 0:
+                continue
+            stats = {"count": sketch.count, "mean_ms": sketch.sum / sketch.count * 1000}
+            for label, q in QUANTILES.items():
+                stats[f"{label}_ms"] = sketch.quantile(q) * 1000
+            stats["max_ms"] = sketch.max * 1000
+            groups.setdefault(group, {})[name] = stats
+        return groups
+
+
+class LatencySummaryCollector:
+    """Prometheus summaries (quantiles in seconds) for every tracked sketch"""
+
+    def __init__(self, name: str, documentation: str, tracker: LatencyTracker):
+        self.name = name
+        self.documentation = documentation
+        self.tracker = tracker
+
+    def collect(self):
+        family = SummaryMetricFamily(self.name, self.documentation, labels=["group", "name"])
+        for group, name, sketch in self.tracker.merged():
+            # Summaries have no quantile samples of their own; add them by hand
+            family.add_metric([group, name], count_value=sketch.count, sum_value=sketch.sum)
+            if sketch.count:
+                for q in QUANTILES.values():
+                    family.add_sample(
+                        self.name,
+                        {"group": group, "name": name, "quantile": str(q)},
+                        sketch.quantile(q),
+                    )
+        yield family
@@ -1,53 +1,161 @@
+import gzip
+import json
 import logging
 import socket
 import sys
+import threading
+import time
+import urllib.request
+from collections import deque
 from datetime import datetime
 
-# Custom handler that silently fails if logging to Loki fails
-class SafeHandler(logging.Handler):
-    def __init__(self, target_handler):
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+# Log shipping metrics
+LOKI_QUEUE_DEPTH = Gauge(
+    "api_loki_queue_depth", "Log records waiting to be shipped to Loki", multiprocess_mode="livesum"
+)
+LOKI_DROPPED = Counter(
+    "api_loki_dropped_records_total",
+    "Log records dropped before reaching Loki",
+    ["reason"]  # 'overflow' or 'send_failed'
+)
+LOKI_FLUSH_LATENCY = Histogram(
+    "api_loki_flush_duration_seconds",
+    "Time spent pushing one batch of log records to Loki, including retries"
+)
+
+
+class LokiShipper(logging.Handler):
+    """
+    Non-blocking Loki handler
+
+    ``emit`` only formats the record and appends it to a bounded in-memory
+    queue, so request handlers never wait on the network. A daemon thread
+    drains the queue in batches (by size or flush interval), gzips the push
+    payload and retries failed pushes with exponential backoff. When the
+    queue is full the oldest records are dropped.
+    """
+
+    def __init__(self, url, tags=None, batch_size=500, flush_interval=1.0,
+                 max_queue=10000, max_retries=3, timeout=5.0):
         super().__init__()
-        self.target_handler = target_handler
-        
+        self.url = url
+        self.tags = tags or {}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self._queue = deque(maxlen=max_queue)
+        self._wakeup = threading.Condition(threading.Lock())
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="loki-shipper", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
     def emit(self, record):
         try:
-            self.target_handler.emit(record)
+            entry = (str(int(record.created * 1e9)), record.levelname.lower(), self.format(record))
         except Exception:
-            # Silently fail - explicitly suppress the handleError call
-            pass
+            self.handleError(record)
+            return
+        with self._wakeup:
+            if len(self._queue) == self._queue.maxlen:
+                LOKI_DROPPED.labels(reason="overflow").inc()
+            self._queue.append(entry)
+            LOKI_QUEUE_DEPTH.set(len(self._queue))
+            if len(self._queue) >= self.batch_size:
+                self._wakeup.notify()
 
     def handleError(self, record):
-        # Override handleError to prevent any error output
+        # Logging must never raise into, or print from, request handlers
         pass
 
+    def close(self):
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join(timeout=self.timeout)
+        super().close()
+
+    def _take_batch(self):
+        with self._wakeup:
+            if not self._closed and len(self._queue) < self.batch_size:
+                self._wakeup.wait(timeout=self.flush_interval)
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            LOKI_QUEUE_DEPTH.set(len(self._queue))
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._ship(batch)
+            elif self._closed:
+                return
+
+    def _payload(self, batch):
+        streams = {}
+        for timestamp, level, line in batch:
+            streams.setdefault(level, []).append([timestamp, line])
+        return {
+            "streams": [
+                {"stream": {**self.tags, "severity": level}, "values": values}
+                for level, values in streams.items()
+            ]
+        }
+
+    def _ship(self, batch):
+        body = gzip.compress(json.dumps(self._payload(batch)).encode("utf-8"))
+        request = urllib.request.Request(
+            self.url,
+            data=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            method="POST",
+        )
+        start_time = time.perf_counter()
+        delay = 0.5
+        for attempt in range(self.max_retries + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    break
+            except Exception:
+                if attempt == self.max_retries or self._closed:
+                    LOKI_DROPPED.labels(reason="send_failed").inc(len(batch))
+                    break
+                time.sleep(delay)
+                delay *= 2
+        LOKI_FLUSH_LATENCY.observe(time.perf_counter() - start_time)
+
+
 def setup_logging():
-    
+
     logger = logging.getLogger("api")
-    
-    # Try setting up Loki (optional)
-    try:
-        import logging_loki
-        # Using host.docker.internal instead of localhost to properly reach Loki container from host machine
-        loki_url = "http://localhost:3100/loki/api/v1/push"
-        
-        logger.info(f"Attempting to connect to Loki at {loki_url}")
-        
-        loki_direct_handler = logging_loki.LokiHandler(
-            url=loki_url, 
+
+    # Ship logs to Loki off the request path (optional)
+    if settings.LOKI_ENABLED and settings.LOKI_URL:
+        logger.info(f"Shipping logs to Loki at {settings.LOKI_URL}")
+        loki_handler = LokiShipper(
+            url=settings.LOKI_URL,
             tags={"service": "api-server", "host": socket.gethostname()},
-            version="1",
+            batch_size=settings.LOKI_BATCH_SIZE,
+            flush_interval=settings.LOKI_FLUSH_INTERVAL_SECONDS,
+            max_queue=settings.LOKI_MAX_QUEUE_SIZE,
+            max_retries=settings.LOKI_MAX_RETRIES,
         )
-        # Wrap the Loki handler in our SafeHandler to prevent exceptions
-        loki_handler = SafeHandler(loki_direct_handler)
         logger.addHandler(loki_handler)
-        logger.info("Successfully connected to Loki logging service")
-    except Exception as e:
-        # Log the exception but continue without Loki
-        logger.warning(f"Failed to connect to Loki: {str(e)}")
-    
+    else:
+        logger.info("Loki log shipping disabled")
+
     # Log startup info
     logger.info(f"Initializing application on {socket.gethostname()}")
     logger.info(f"Python version: {sys.version}")
     logger.info(f"Current time: {datetime.now().isoformat()}")
-    
-    return logger
\ No newline at end of file
+
+    return logger
@@ -1,8 +1,12 @@
 """
 E-commerce specific metrics for Prometheus monitoring
 """
-from prometheus_client import Counter, Histogram, Gauge, Summary
+import os
+from prometheus_client import Counter, Histogram, Gauge, Summary, REGISTRY, CollectorRegistry
+from prometheus_client import multiprocess
 from app.core.config import settings
+from app.core.latency import LatencySummaryCollector, LatencyTracker
+from app.core.topk import SpaceSaving, TopKCollector
 
 # Namespace for Prometheus metrics
 NAMESPACE = settings.MONITORING_NAMESPACE
@@ -23,7 +27,38 @@ PRODUCT_SEARCH_RESULTS = Histogram(
 PRODUCT_VIEWS = Counter(
     f"{NAMESPACE}_product_views_total",
     "Total count of individual product views",
-    ["product_id", "category"]
+    ["category"]
+)
+
+# Per-product views are tracked in a fixed-size sketch; only the top K are exported
+PRODUCT_VIEW_HITTERS = SpaceSaving(capacity=settings.TOP_PRODUCTS_CAPACITY)
+TOP_PRODUCT_VIEWS = TopKCollector(
+    f"{NAMESPACE}_top_product_views",
+    "Estimated view count of the most viewed products (upper bound)",
+    "product_id",
+    PRODUCT_VIEW_HITTERS,
+    k=settings.TOP_PRODUCTS_K
+)
+REGISTRY.register(TOP_PRODUCT_VIEWS)
+
+# Windowed tail latency per route and per search complexity (/stats/latency)
+LATENCY_TRACKER = LatencyTracker(
+    window_seconds=settings.LATENCY_WINDOW_SECONDS,
+    slots=settings.LATENCY_WINDOW_SLOTS,
+    relative_accuracy=settings.LATENCY_RELATIVE_ACCURACY
+)
+LATENCY_SUMMARIES = LatencySummaryCollector(
+    f"{NAMESPACE}_latency_window_seconds",
+    "Latency quantiles over the recent window, per route and search complexity",
+    LATENCY_TRACKER
+)
+if settings.LATENCY_SUMMARIES_ENABLED:
+    REGISTRY.register(LATENCY_SUMMARIES)
+
+PRODUCT_BATCH_SIZE = Histogram(
+    f"{NAMESPACE}_product_batch_size",
+    "Number of ids requested per batch product lookup",
+    buckets=[1, 5, 10, 25, 50, 100, 250, 500]
 )
 
 # Filter usage metrics
@@ -52,4 +87,77 @@ ZERO_RESULTS_SEARCHES = Counter(
     f"{NAMESPACE}_zero_results_searches_total",
     "Searches that returned zero results",
     ["query_type"]  # 'text', 'category', 'filter'
-)
\ No newline at end of file
+)
+
+# Cache metrics
+CACHE_HITS = Counter(
+    f"{NAMESPACE}_cache_hits_total",
+    "Cache lookups that returned a stored value",
+    ["cache"]
+)
+
+CACHE_MISSES = Counter(
+    f"{NAMESPACE}_cache_misses_total",
+    "Cache lookups that found no usable value",
+    ["cache"]
+)
+
+CACHE_EVICTIONS = Counter(
+    f"{NAMESPACE}_cache_evictions_total",
+    "Cache entries removed before being read again",
+    ["cache", "reason"]  # 'size' or 'expired'
+)
+
+CACHE_SIZE_BYTES = Gauge(
+    f"{NAMESPACE}_cache_size_bytes",
+    "Approximate memory held by cache entries",
+    ["cache"],
+    multiprocess_mode="livesum"
+)
+
+CACHE_TIER_LOOKUPS = Counter(
+    f"{NAMESPACE}_cache_tier_lookups_total",
+    "Two-tier cache lookups by tier and outcome",
+    ["cache", "tier", "result"]  # tier 'l1' or 'l2'; result 'hit', 'miss', 'early' or 'error'
+)
+
+CACHE_L2_LATENCY = Histogram(
+    f"{NAMESPACE}_cache_l2_duration_seconds",
+    "Round trip to the shared (L2) cache",
+    ["operation"],  # 'get' or 'set'
+    buckets=[0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1]
+)
+
+# Request coalescing
+REQUESTS_COALESCED = Counter(
+    f"{NAMESPACE}_requests_coalesced_total",
+    "Requests served by awaiting an identical in-flight computation",
+    ["operation"]
+)
+
+# SQLite catalog backend
+DB_QUERY_LATENCY = Histogram(
+    f"{NAMESPACE}_db_query_duration_seconds",
+    "Time to run a catalog query, including waiting for a pooled connection",
+    ["operation"],  # 'search', 'get', 'get_many' or 'facets'
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5]
+)
+
+
+def exposition_registry():
+    """
+    Registry to render for /metrics
+
+    Under a multi-worker launch (PROMETHEUS_MULTIPROC_DIR set) this merges
+    the per-process metric files of every worker. The heavy-hitters sketch
+    and latency sketches live in process memory, so they reflect the worker
+    serving the scrape.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(TOP_PRODUCT_VIEWS)
+    if settings.LATENCY_SUMMARIES_ENABLED:
+        registry.register(LATENCY_SUMMARIES)
+    return registry
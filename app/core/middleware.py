@@ -1,14 +1,21 @@
+import os
 import time
 import logging
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from starlette.datastructures import URL
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from prometheus_client import Counter, Histogram, Gauge
 from opentelemetry import trace
 from opentelemetry.trace.status import Status, StatusCode
 
+from app.core.config import settings
+from app.core.metrics import LATENCY_TRACKER
+from app.core.recorder import RequestRecorder
+from app.core.tracing import keep_span
+
 # Get logger
 logger = logging.getLogger("api")
 tracer = trace.get_tracer(__name__)
@@ -17,7 +24,132 @@ tracer = trace.get_tracer(__name__)
 REQUESTS = Counter("api_requests_total", "Total count of requests", ["method", "endpoint"])
 EXCEPTIONS = Counter("api_exceptions_total", "Total count of exceptions", ["endpoint", "exception_type"])
 LATENCY = Histogram("api_request_duration_seconds", "Request duration", ["method", "endpoint"])
-ACTIVE_REQUESTS = Gauge("api_active_requests", "Number of currently active requests")
+ACTIVE_REQUESTS = Gauge(
+    "api_active_requests", "Number of currently active requests", multiprocess_mode="livesum"
+)
+
+# Label for requests that did not match any route, so scanners cannot add series
+UNMATCHED_ROUTE = "unmatched"
+
+# Methods kept as-is in metric labels; anything else is reported as OTHER
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# Paths served without tracing or request metrics
+EXCLUDED_PATHS = {"/metrics"}
+
+# Attach trace IDs of exported spans to latency observations. The multi-process
+# collector cannot store exemplars, so they are skipped under several workers
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+EXEMPLARS_ENABLED = settings.METRICS_EXEMPLARS and not MULTIPROCESS
+
+
+def route_template(scope) -> str:
+    """Path template of the matched route (e.g. /products/{product_id})"""
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsTracingMiddleware:
+    """
+    Raw ASGI middleware recording request metrics and one server span per request
+
+    Unlike ``@app.middleware("http")`` this does not run the app in a
+    separate task or re-stream the response body; it only watches the
+    ``http.response.start`` message for the status code. Labelled metric
+    children are cached per (method, route template).
+    """
+
+    def __init__(self, app, recorder=None):
+        self.app = app
+        # Optional RequestRecorder capturing traffic for load replay
+        self.recorder = recorder
+        self._children = {}
+
+    def _metrics(self, method: str, endpoint: str):
+        children = self._children.get((method, endpoint))
+        if children is None:
+            children = self._children[(method, endpoint)] = (
+                REQUESTS.labels(method=method, endpoint=endpoint),
+                LATENCY.labels(method=method, endpoint=endpoint),
+                LATENCY_TRACKER.sketch("route", f"{method} {endpoint}"),
+            )
+        return children
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with tracer.start_as_current_span(
+            name=method,
+            kind=trace.SpanKind.SERVER,
+            record_exception=False,
+            set_status_on_exception=False,
+        ) as span:
+            ACTIVE_REQUESTS.inc()
+            start_time = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except Exception as e:
+                # Handle exceptions
+                exception_type = type(e).__name__
+                EXCEPTIONS.labels(endpoint=route_template(scope), exception_type=exception_type).inc()
+
+                # Add error details to span
+                span.set_status(Status(StatusCode.ERROR))
+                span.record_exception(e)
+                span.set_attribute("error.type", exception_type)
+                span.set_attribute("error.message", str(e))
+
+                logger.error(f"500 - ❌ Exception on {method} {scope['path']}: {e}")
+                raise
+            finally:
+                duration = time.perf_counter() - start_time
+                ACTIVE_REQUESTS.dec()
+
+                # Metrics are labelled by route template, known once routing is done
+                endpoint = route_template(scope)
+                requests, latency, sketch = self._metrics(
+                    method if method in KNOWN_METHODS else "OTHER", endpoint
+                )
+                requests.inc()
+                sketch.add(duration)
+                if self.recorder is not None:
+                    self.recorder.record(
+                        method, scope["path"], scope["query_string"].decode("latin-1"),
+                        endpoint, status_code, duration
+                    )
+
+                # Unsampled spans skip attribute formatting entirely
+                kept = span.is_recording() and keep_span(span, status_code, duration)
+                if kept and EXEMPLARS_ENABLED:
+                    # Links the latency bucket to this trace in OpenMetrics scrapes
+                    trace_id = format(span.get_span_context().trace_id, "032x")
+                    latency.observe(duration, exemplar={"trace_id": trace_id})
+                else:
+                    latency.observe(duration)
+
+                if kept:
+                    client = scope.get("client")
+                    span.update_name(f"{method} {endpoint}")
+                    span.set_attributes({
+                        "http.method": method,
+                        "http.url": str(URL(scope=scope)),
+                        "http.route": endpoint,
+                        "http.status_code": status_code,
+                        "client.ip": client[0] if client else "unknown",
+                        "duration_ms": duration * 1000,
+                    })
+
 
 def setup_middleware(app: FastAPI):
     """Configure all middleware for the application"""
@@ -31,64 +163,12 @@ def setup_middleware(app: FastAPI):
         allow_headers=["*"],
     )
     
-    # Request metrics and tracing middleware
-    @app.middleware("http")
-    async def metrics_and_tracing_middleware(request: Request, call_next):
-        method = request.method
-        endpoint = request.url.path
-        
-        # Skip tracing for excluded endpoints
-        if endpoint != "/metrics":
-            with tracer.start_as_current_span(
-                name=f"{method} {endpoint}",
-                kind=trace.SpanKind.SERVER,
-            ) as span:
-                try:
-                    # Add request details to span
-                    span.set_attribute("http.method", method)
-                    span.set_attribute("http.url", str(request.url))
-                    span.set_attribute("http.route", endpoint)
-                    
-                    # Add custom attributes if needed
-                    client_ip = request.client.host if request.client else "unknown"
-                    span.set_attribute("client.ip", client_ip)
-                    
-                    # Standard metrics
-                    REQUESTS.labels(method=method, endpoint=endpoint).inc()
-                    ACTIVE_REQUESTS.inc()
-                    start_time = time.time()
-
-                    # Execute the request
-                    response = await call_next(request)
-                    
-                    # Add response information to span
-                    span.set_attribute("http.status_code", response.status_code)
-                    duration = time.time() - start_time
-                    span.set_attribute("duration_ms", duration * 1000)
-                    
-                    # Update metrics
-                    LATENCY.labels(method=method, endpoint=endpoint).observe(duration)
-                    
-                    return response
-                    
-                except Exception as e:
-                    # Handle exceptions
-                    exception_type = type(e).__name__
-                    EXCEPTIONS.labels(endpoint=endpoint, exception_type=exception_type).inc()
-                    
-                    # Add error details to span
-                    span.set_status(Status(StatusCode.ERROR))
-                    span.record_exception(e)
-                    span.set_attribute("error.type", exception_type)
-                    span.set_attribute("error.message", str(e))
-                    
-                    logger.error(f"500 - ❌ Exception on {method} {endpoint}: {e}")
-                    raise
-                finally:
-                    ACTIVE_REQUESTS.dec()
-        else:
-            # For excluded endpoints, just process without tracing
-            return await call_next(request)
+    if settings.METRICS_EXEMPLARS and MULTIPROCESS:
+        logger.warning("⚠️ METRICS_EXEMPLARS is ignored with PROMETHEUS_MULTIPROC_DIR set; exemplars need a single worker")
+
+    # Request metrics and tracing middleware, optionally recording traffic
+    recorder = RequestRecorder(settings.REQUEST_LOG_PATH) if settings.REQUEST_LOG_PATH else None
+    app.add_middleware(MetricsTracingMiddleware, recorder=recorder)
 
     # Update the exception handlers to include tracing
     @app.exception_handler(StarletteHTTPException)
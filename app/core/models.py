@@ -30,8 +30,54 @@ class ProductSearchParams(BaseModel):
     availability: Optional[bool] = None
     min_rating: Optional[float] = Field(None, ge=0, le=5)
 
+    def cache_key(self) -> str:
+        """
+        Canonical form of the filters for cache lookups
+
+        Unset and empty filters are dropped, strings are lowercased (every
+        filter is case-insensitive) and floats are normalized, so equivalent
+        searches share a key.
+        """
+        parts = []
+        for name, value in sorted(self.model_dump(exclude_none=True).items()):
+            if isinstance(value, str):
+                if not value:
+                    continue
+                value = value.lower()
+            elif isinstance(value, bool):
+                value = int(value)
+            elif isinstance(value, float):
+                value = repr(value)
+            parts.append(f"{name}={value}")
+        return "&".join(parts)
+
 
 class ProductResponse(BaseModel):
     """Standard response format for products"""
+    total: Optional[int]
+    results: List[Product]
+    next_cursor: Optional[str] = None
+
+
+class ProductBatchResponse(BaseModel):
+    """Response format for batch product lookups"""
+    results: List[Product]
+    missing: List[int]
+
+
+class Suggestion(BaseModel):
+    """Search-box completion: a product name, brand, category, subcategory or description term"""
+    text: str
+    type: str
+    id: Optional[int] = None  # product ID for product suggestions
+
+
+class SuggestResponse(BaseModel):
+    """Response format for autocomplete"""
+    suggestions: List[Suggestion]
+
+
+class FacetResponse(BaseModel):
+    """Facet counts for a set of search filters"""
     total: int
-    results: List[Product]
\ No newline at end of file
+    facets: Dict[str, Dict[str, int]]
@@ -0,0 +1,71 @@
+"""
+Traffic recording for load replay (benchmarks/replay.py)
+"""
+import atexit
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, TextIO
+
+
+def process_path(path: str, pid: int) -> str:
+    """``path`` with the process ID before its extension: traffic.jsonl -> traffic.1234.jsonl"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{pid}{extension}"
+
+
+class RequestRecorder:
+    """
+    Appends one JSON line per request to a file of this process's own
+
+    Each line holds what is needed to replay the request (method, path and
+    query string) plus the route template, status and duration observed
+    live. Every worker process writes ``path`` suffixed with its PID (see
+    ``process_path``), so workers never interleave lines. Lines are
+    batched in memory and every ``flush_every`` of them are written by a
+    background thread, so the event loop never waits on the disk; the rest
+    are written at exit.
+    """
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self._lines: List[str] = []
+        # Opened on first use, in the worker process that records
+        self._file: Optional[TextIO] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        atexit.register(self.close)
+
+    def record(self, method: str, path: str, query: str, endpoint: str,
+               status_code: int, duration: float):
+        self._lines.append(json.dumps({
+            "ts": round(time.time(), 3),
+            "method": method,
+            "path": path,
+            "query": query,
+            "endpoint": endpoint,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 3),
+        }) + "\n")
+        if len(self._lines) >= self.flush_every:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(1, thread_name_prefix="recorder")
+            self._writer.submit(self._write, "".join(self._lines))
+            self._lines = []
+
+    def _write(self, data: str):
+        if self._file is None:
+            self._file = open(process_path(self.path, os.getpid()), "a", encoding="utf-8")
+        self._file.write(data)
+        self._file.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._lines:
+            self._write("".join(self._lines))
+            self._lines = []
+        if self._file is not None and not self._file.closed:
+            self._file.close()
@@ -0,0 +1,42 @@
+"""
+Request coalescing for identical concurrent computations
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.metrics import REQUESTS_COALESCED
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one computation.
+
+    The first caller for a key starts ``fn`` in a task owned by the flight;
+    every caller, the first included, awaits that task through a shield, so
+    a cancelled caller gives up only its own wait and never fails the
+    others. Nothing is kept once the computation finishes, so this
+    complements rather than replaces a result cache.
+    """
+
+    def __init__(self, operation: str):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._coalesced = REQUESTS_COALESCED.labels(operation=operation)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is not None:
+            self._coalesced.inc()
+        else:
+            task = self._inflight[key] = asyncio.ensure_future(fn())
+
+            def finished(done: asyncio.Future):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+                # Mark retrieved so an exception nobody is left awaiting is not logged
+                if not done.cancelled():
+                    done.exception()
+
+            task.add_done_callback(finished)
+        return await asyncio.shield(task)
@@ -0,0 +1,299 @@
+"""
+Two-tier caching: an in-process LRU (L1) in front of a cache shared by
+every worker and replica (L2)
+
+The shared tier is chosen by ``CACHE_URL``:
+
+- ``redis://host:6379/0`` (also ``rediss://`` and ``unix://``): Redis or any
+  server speaking its protocol, through redis-py's asyncio client
+- ``fakeredis://``: an in-process fakeredis server, for tests and local runs
+- ``sqlite:///path/to/cache.db``: a SQLite file shared by the workers on one host
+
+Entries carry their expiry and how long they took to compute. Reads refresh
+an entry early with a probability that rises as its expiry approaches
+(XFetch), so a popular key is recomputed once shortly before it expires
+rather than by every caller at once right after.
+"""
+import asyncio
+import logging
+import math
+import random
+import sqlite3
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.metrics import CACHE_L2_LATENCY, CACHE_TIER_LOOKUPS
+from app.core.singleflight import SingleFlight
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger("api")
+
+# Expiry (unix time) and compute seconds, prefixed to each value in L2
+_HEADER = struct.Struct("!dd")
+
+# Seconds the shared tier is bypassed after a failed call
+_L2_RETRY_SECONDS = 5.0
+
+
+class SharedCache(ABC):
+    """Byte-string store shared across processes"""
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Values for ``keys`` in order, None where missing or expired"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisCache(SharedCache):
+    """Redis-protocol server: one MGET per batch read, one pipelined round trip per batch write"""
+
+    def __init__(self, client):
+        self._client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        if aioredis is None:
+            raise RuntimeError("CACHE_URL needs the redis package (pip install redis)")
+        return cls(aioredis.from_url(url))
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self._client.mget(keys)
+
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: float) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, px=max(1, int(ttl_seconds * 1000)))
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class SQLiteCache(SharedCache):
+    """
+    Cache table in a SQLite file, shared by the workers on one host
+
+    Calls run in the threadpool over one WAL-mode connection per process;
+    expired rows are skipped on read and purged every few hundred writes.
+    """
+
+    _PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await run_in_threadpool(self._get_many, keys)
+
+    def _get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            rows = dict(self._connection.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(keys))}) AND expires_at > ?",
+                [*keys, time.time()],
+            ))
+        return [rows.get(key) for key in keys]
+
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: float) -> None:
+        await run_in_threadpool(self._set_many, items, ttl_seconds)
+
+    def _set_many(self, items: Dict[str, bytes], ttl_seconds: float) -> None:
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                [(key, value, now + ttl_seconds) for key, value in items.items()],
+            )
+            self._writes += len(items)
+            if self._writes >= self._PURGE_EVERY:
+                self._writes = 0
+                self._connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    async def close(self) -> None:
+        self._connection.close()
+
+
+def create_shared_cache(url: str) -> SharedCache:
+    """Shared tier for a ``CACHE_URL``"""
+    scheme = url.split("://", 1)[0]
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisCache.from_url(url)
+    if scheme == "fakeredis":
+        try:
+            import fakeredis
+        except ImportError:
+            raise RuntimeError("CACHE_URL=fakeredis:// needs the fakeredis package (pip install fakeredis)")
+        return RedisCache(fakeredis.FakeAsyncRedis())
+    if url.startswith("sqlite:///"):
+        return SQLiteCache(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported CACHE_URL (expected redis://, fakeredis:// or sqlite:///path): {url}")
+
+
+class TieredCache:
+    """
+    Bytes cache checked in process first, then in the shared tier
+
+    Values found in L2 are copied into L1. Writes land in L1 at once and in
+    L2 from a background task, so a slow shared cache delays no response;
+    after an L2 error the tier is bypassed for a few seconds. Lookups are
+    exported per tier as hits, misses, early refreshes and errors.
+    """
+
+    def __init__(self, name: str, shared: Optional[SharedCache], max_bytes: int,
+                 ttl_seconds: float, prefix: str = "", beta: float = 1.0):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.beta = beta
+        self._local = TTLCache(name, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        self._shared = shared
+        self._prefix = f"{prefix}:{name}:"
+        self._generation = 0
+        self._flight = SingleFlight(name)
+        self._retry_at = 0.0
+        self._writes: set = set()
+
+        self._l1 = {r: CACHE_TIER_LOOKUPS.labels(cache=name, tier="l1", result=r)
+                    for r in ("hit", "miss", "early")}
+        self._l2 = {r: CACHE_TIER_LOOKUPS.labels(cache=name, tier="l2", result=r)
+                    for r in ("hit", "miss", "early", "error")}
+        self._l2_get = CACHE_L2_LATENCY.labels(operation="get")
+        self._l2_set = CACHE_L2_LATENCY.labels(operation="set")
+
+    def _freshness(self, expires_at: float, delta: float) -> str:
+        """'hit', 'early' (XFetch chose to recompute ahead of expiry) or 'miss' (expired)"""
+        now = time.time()
+        if now >= expires_at:
+            return "miss"
+        # -log(u) is exponential: slow computations and near expiries refresh sooner
+        if now - delta * self.beta * math.log(1.0 - random.random()) >= expires_at:
+            return "early"
+        return "hit"
+
+    async def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Fresh values for whichever ``keys`` either tier holds"""
+        found: Dict[str, bytes] = {}
+        remote = []
+        for key in keys:
+            entry = self._local.get(key)
+            result = "miss" if entry is None else self._freshness(entry[1], entry[2])
+            self._l1[result].inc()
+            if result == "hit":
+                found[key] = entry[0]
+            else:
+                remote.append(key)
+
+        if not remote or not self._shared_available():
+            return found
+
+        start = time.perf_counter()
+        try:
+            values = await self._shared.get_many([self._key(key) for key in remote])
+        except Exception as e:
+            self._shared_failed("get", e)
+            return found
+        self._l2_get.observe(time.perf_counter() - start)
+
+        for key, raw in zip(remote, values):
+            if raw is None:
+                self._l2["miss"].inc()
+                continue
+            expires_at, delta = _HEADER.unpack_from(raw)
+            result = self._freshness(expires_at, delta)
+            self._l2[result].inc()
+            if result == "hit":
+                value = raw[_HEADER.size:]
+                found[key] = value
+                self._local.set(key, (value, expires_at, delta), len(value) + len(key))
+        return found
+
+    def set_many(self, items: Dict[str, bytes], delta: float) -> None:
+        """Store ``items``, which took ``delta`` seconds to compute, in both tiers"""
+        expires_at = time.time() + self.ttl_seconds
+        for key, value in items.items():
+            self._local.set(key, (value, expires_at, delta), len(value) + len(key))
+
+        if items and self._shared_available():
+            header = _HEADER.pack(expires_at, delta)
+            task = asyncio.create_task(
+                self._store({self._key(key): header + value for key, value in items.items()})
+            )
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def fetch(self, key: str, compute: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        """
+        Cached value for ``key``, or the result of ``compute``, which is
+        stored unless None. Concurrent misses share one computation.
+        """
+        value = (await self.get_many([key])).get(key)
+        if value is None:
+            value = await self._flight.do(key, lambda: self._compute(key, compute))
+        return value
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        start = time.perf_counter()
+        value = await compute()
+        if value is not None:
+            self.set_many({key: value}, time.perf_counter() - start)
+        return value
+
+    async def _store(self, items: Dict[str, bytes]) -> None:
+        start = time.perf_counter()
+        try:
+            await self._shared.set_many(items, self.ttl_seconds)
+        except Exception as e:
+            self._shared_failed("set", e)
+            return
+        self._l2_set.observe(time.perf_counter() - start)
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{self._generation}:{key}"
+
+    def clear(self) -> None:
+        """
+        Forget every cached value: L1 is emptied and this process moves to
+        a new L2 key generation, leaving older shared entries to expire
+        """
+        self._local.clear()
+        self._generation += 1
+
+    def _shared_available(self) -> bool:
+        return self._shared is not None and time.monotonic() >= self._retry_at
+
+    def _shared_failed(self, operation: str, error: Exception) -> None:
+        self._l2["error"].inc()
+        self._retry_at = time.monotonic() + _L2_RETRY_SECONDS
+        logger.warning(
+            f"⚠️ Shared cache {operation} failed for {self.name}, "
+            f"bypassing it for {_L2_RETRY_SECONDS:.0f}s: {error}"
+        )
+
+    async def flush(self) -> None:
+        """Wait for background L2 writes to finish"""
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
@@ -0,0 +1,58 @@
+"""
+Bounded-memory heavy-hitter tracking for high-cardinality counters
+"""
+import threading
+from typing import Dict, Hashable, List, Tuple
+
+from prometheus_client.core import GaugeMetricFamily
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch (Metwally et al.)
+
+    Tracks at most ``capacity`` items. When a new item arrives and the
+    table is full, it replaces the item with the smallest count and inherits
+    that count, so every reported count is an upper bound that overestimates
+    by at most ``total / capacity``. Memory is constant regardless of how
+    many distinct items are seen.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counts: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, item: Hashable, count: int = 1) -> None:
+        with self._lock:
+            if item in self._counts:
+                self._counts[item] += count
+            elif len(self._counts) < self.capacity:
+                self._counts[item] = count
+            else:
+                # Linear scan is fine for the small capacities used here
+                victim = min(self._counts, key=self._counts.__getitem__)
+                self._counts[item] = self._counts.pop(victim) + count
+
+    def top(self, k: int) -> List[Tuple[Hashable, int]]:
+        """The ``k`` items with the highest estimated counts"""
+        with self._lock:
+            items = list(self._counts.items())
+        return sorted(items, key=lambda item: item[1], reverse=True)[:k]
+
+
+class TopKCollector:
+    """Prometheus collector exporting only the top ``k`` items of a sketch"""
+
+    def __init__(self, name: str, documentation: str, label: str, sketch: SpaceSaving, k: int):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.sketch = sketch
+        self.k = k
+
+    def collect(self):
+        family = GaugeMetricFamily(self.name, self.documentation, labels=[self.label])
+        for item, count in self.sketch.top(self.k):
+            family.add_metric([str(item)], count)
+        yield family
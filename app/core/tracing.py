@@ -1,36 +1,103 @@
 from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import TracerProvider, SpanProcessor
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, TraceIdRatioBased
 from opentelemetry.exporter.jaeger.thrift import JaegerExporter
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.semconv.resource import ResourceAttributes
 
+from app.core.config import settings
+
+# Span attribute marking a span kept by the error/slow rules in "rules" mode
+RULE_KEEP_ATTRIBUTE = "sampling.rule"
+
+_TRACE_ID_LOW_BITS = (1 << 64) - 1
+
+
+def _ratio_selected(trace_id: int) -> bool:
+    """Deterministic per-trace ratio decision, same scheme as TraceIdRatioBased"""
+    return trace_id & _TRACE_ID_LOW_BITS < settings.TRACE_SAMPLE_RATIO * (1 << 64)
+
+
+def keep_span(span, status_code: int, duration: float) -> bool:
+    """
+    Whether a finished request span will be exported
+
+    Spans the head sampler dropped are non-recording and never reach this.
+    In "rules" mode every span is recorded, and only errors, slow requests
+    and a ratio sample of the rest are kept; callers skip formatting
+    attributes for the others.
+    """
+    if settings.TRACE_SAMPLER != "rules":
+        return True
+    if _ratio_selected(span.get_span_context().trace_id):
+        return True
+    if status_code >= 500:
+        span.set_attribute(RULE_KEEP_ATTRIBUTE, "error")
+        return True
+    if duration * 1000 >= settings.TRACE_SLOW_REQUEST_MS:
+        span.set_attribute(RULE_KEEP_ATTRIBUTE, "slow")
+        return True
+    return False
+
+
+class RuleBasedSpanProcessor(SpanProcessor):
+    """Forwards only ratio-selected spans and spans kept by ``keep_span`` rules"""
+
+    def __init__(self, delegate: SpanProcessor):
+        self.delegate = delegate
+
+    def on_start(self, span, parent_context=None):
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span):
+        if _ratio_selected(span.context.trace_id) or RULE_KEEP_ATTRIBUTE in span.attributes:
+            self.delegate.on_end(span)
+
+    def shutdown(self):
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+def _sampler():
+    """Head sampler for TRACE_SAMPLER: always_on, ratio (parent-based) or rules"""
+    if settings.TRACE_SAMPLER == "ratio":
+        return ParentBased(TraceIdRatioBased(settings.TRACE_SAMPLE_RATIO))
+    if settings.TRACE_SAMPLER in ("always_on", "rules"):
+        # "rules" records everything and decides at span end
+        return ParentBased(ALWAYS_ON)
+    raise ValueError(f"Unknown TRACE_SAMPLER: {settings.TRACE_SAMPLER}")
+
+
 def setup_tracing(app):
     """Configure OpenTelemetry with Jaeger exporter"""
     # Create a resource with service name
     resource = Resource.create({
         ResourceAttributes.SERVICE_NAME: "ecommerce-api"
     })
-    
+
     # Set up the tracer with resource
-    provider = TracerProvider(resource=resource)
+    provider = TracerProvider(resource=resource, sampler=_sampler())
     trace.set_tracer_provider(provider)
-    
+
     # Configure the Jaeger exporter
     jaeger_exporter = JaegerExporter(
         # Use the collector endpoint instead of agent
-        collector_endpoint='http://localhost:14268/api/traces',
+        collector_endpoint=settings.JAEGER_COLLECTOR_ENDPOINT,
         max_tag_value_length=4096
     )
-    
+
     # Add SpanProcessor to the tracer
-    provider.add_span_processor(
-        BatchSpanProcessor(jaeger_exporter)
+    # Server spans come from MetricsTracingMiddleware; FastAPIInstrumentor is not
+    # used, as it would record a second span per request
+    processor = BatchSpanProcessor(
+        jaeger_exporter,
+        max_queue_size=settings.TRACE_MAX_QUEUE_SIZE,
+        max_export_batch_size=settings.TRACE_MAX_EXPORT_BATCH_SIZE,
+        schedule_delay_millis=settings.TRACE_EXPORT_INTERVAL_MS,
     )
-    
-    # Instrument FastAPI
-    FastAPIInstrumentor.instrument_app(
-        app,
-        excluded_urls="/metrics"
-    )
\ No newline at end of file
+    if settings.TRACE_SAMPLER == "rules":
+        processor = RuleBasedSpanProcessor(processor)
+    provider.add_span_processor(processor)
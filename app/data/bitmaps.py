@@ -0,0 +1,149 @@
+"""
+Packed bitmap indexes for the low-cardinality product facets
+"""
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.core.models import ProductSearchParams
+from app.data.columns import ProductColumns
+
+# Per-byte popcount table for NumPy versions without np.bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Bytes unpacked per step when lazily iterating a bitmap
+_ITER_CHUNK_BYTES = 512
+
+
+class Bitmap:
+    """
+    Fixed-size set of catalog positions packed eight per byte.
+
+    AND/OR run over ``size / 8`` bytes and ``count()`` is a popcount, so
+    combining facets and computing ``total`` never touches product dicts.
+    """
+
+    __slots__ = ("bits", "size")
+
+    def __init__(self, bits: np.ndarray, size: int):
+        self.bits = bits
+        self.size = size
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "Bitmap":
+        return cls(np.packbits(mask, bitorder="little"), len(mask))
+
+    @classmethod
+    def from_positions(cls, positions: Union[Sequence[int], np.ndarray], size: int) -> "Bitmap":
+        mask = np.zeros(size, dtype=np.bool_)
+        mask[np.asarray(positions, dtype=np.intp)] = True
+        return cls.from_mask(mask)
+
+    @classmethod
+    def full(cls, size: int) -> "Bitmap":
+        return cls.from_mask(np.ones(size, dtype=np.bool_))
+
+    @classmethod
+    def empty(cls, size: int) -> "Bitmap":
+        return cls(np.zeros((size + 7) // 8, dtype=np.uint8), size)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        return Bitmap(np.bitwise_and(self.bits, other.bits), self.size)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        return Bitmap(np.bitwise_or(self.bits, other.bits), self.size)
+
+    def __iand__(self, other: "Bitmap") -> "Bitmap":
+        np.bitwise_and(self.bits, other.bits, out=self.bits)
+        return self
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def count(self) -> int:
+        """Number of set positions"""
+        if hasattr(np, "bitwise_count"):
+            return int(np.bitwise_count(self.bits).sum(dtype=np.int64))
+        return int(_POPCOUNT_TABLE[self.bits].sum(dtype=np.int64))
+
+    def positions(self) -> np.ndarray:
+        """Set positions in ascending (catalog) order"""
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.size, bitorder="little"))
+
+    def iter_positions(self, start: int = 0) -> Iterator[np.ndarray]:
+        """Lazily yield set positions ``>= start`` in ascending order, a chunk at a time"""
+        for byte in range(start >> 3, len(self.bits), _ITER_CHUNK_BYTES):
+            bits = np.unpackbits(self.bits[byte:byte + _ITER_CHUNK_BYTES], bitorder="little")
+            positions = np.flatnonzero(bits) + byte * 8
+            if byte * 8 < start:
+                positions = positions[positions >= start]
+            if len(positions):
+                yield positions
+
+    def contains(self, positions: np.ndarray) -> np.ndarray:
+        """Vectorized membership test for an array of positions"""
+        return ((self.bits[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1).astype(np.bool_)
+
+
+def _bitmaps_by_code(codes: np.ndarray, vocabulary: Dict[str, int]) -> Dict[str, Bitmap]:
+    return {value: Bitmap.from_mask(codes == code) for value, code in vocabulary.items()}
+
+
+class BitmapIndex:
+    """
+    One bitmap per distinct value of category, subcategory, brand, color and
+    availability. Equality filters are a dictionary lookup and multi-filter
+    queries are answered with bitwise AND/OR.
+    """
+
+    def __init__(self, columns: ProductColumns):
+        self.size = columns.size
+        self.category = _bitmaps_by_code(columns.category, columns.category_codes)
+        self.subcategory = _bitmaps_by_code(columns.subcategory, columns.subcategory_codes)
+        self.brand = _bitmaps_by_code(columns.brand, columns.brand_codes)
+        self.availability = {
+            True: Bitmap.from_mask(columns.availability),
+            False: Bitmap.from_mask(~columns.availability),
+        }
+
+        self.color: Dict[str, Bitmap] = {}
+        for value, code in columns.color_codes.items():
+            owners = columns.color_owner[columns.color == code]
+            self.color[value] = Bitmap.from_positions(owners, self.size)
+
+    def _lookup(self, bitmaps: Dict[str, Bitmap], value: str) -> Bitmap:
+        bitmap = bitmaps.get(value.lower())
+        return bitmap if bitmap is not None else Bitmap.empty(self.size)
+
+    def color_contains(self, value: str) -> Bitmap:
+        """Products having any color that contains ``value`` (case-insensitive)"""
+        value = value.lower()
+        result = Bitmap.empty(self.size)
+        for color, bitmap in self.color.items():
+            if value in color:
+                result = result | bitmap
+        return result
+
+    def select(self, params: ProductSearchParams) -> Optional[Bitmap]:
+        """AND of the bitmaps for every facet filter in ``params``, or None if unfiltered"""
+        selected: List[Bitmap] = []
+
+        if params.category:
+            selected.append(self._lookup(self.category, params.category))
+        if params.subcategory:
+            selected.append(self._lookup(self.subcategory, params.subcategory))
+        if params.brand:
+            selected.append(self._lookup(self.brand, params.brand))
+        if params.color:
+            selected.append(self.color_contains(params.color))
+        if params.availability is not None:
+            selected.append(self.availability[params.availability])
+
+        if not selected:
+            return None
+        # Copy the first bitmap so the in-place ANDs leave the index intact
+        result = Bitmap(selected[0].bits.copy(), self.size)
+        for bitmap in selected[1:]:
+            result &= bitmap
+        return result
@@ -0,0 +1,141 @@
+"""
+Product repository that caches another one in a two-tier cache
+"""
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.models import ProductSearchParams
+from app.core.tiered_cache import SharedCache, TieredCache
+from app.data.repository import After, ProductRepository, SearchPage
+
+
+def _encode_product(payload: bytes, category: str) -> bytes:
+    return category.encode("utf-8") + b"\n" + payload
+
+
+def _decode_product(value: bytes) -> Tuple[bytes, str]:
+    category, payload = value.split(b"\n", 1)
+    return payload, category.decode("utf-8")
+
+
+def _encode_page(page: SearchPage) -> bytes:
+    header = json.dumps([page.count, page.total, page.next_cursor]).encode("utf-8")
+    return header + b"\n" + page.results
+
+
+def _decode_page(value: bytes) -> SearchPage:
+    header, results = value.split(b"\n", 1)
+    count, total, next_cursor = json.loads(header)
+    return SearchPage(results, count, total, next_cursor)
+
+
+class CachedRepository(ProductRepository):
+    """
+    Serves search pages, products and facet counts from ``TieredCache``s
+    over ``backend``
+
+    Search pages are keyed by every argument that shapes them and products
+    by ID (with their category, for metrics); batch lookups read and fill
+    the product cache in one round trip per tier. Exports, option lists and
+    suggestions come from the backend, which holds them in memory. Shared
+    entries live for ``CACHE_EXPIRY_SECONDS``; ``CACHE_KEY_PREFIX`` keeps
+    deployments serving different catalogs apart, and ``clear`` drops
+    everything cached when the in-memory catalog is reloaded.
+    """
+
+    def __init__(self, backend: ProductRepository, shared: Optional[SharedCache]):
+        self.backend = backend
+        self._shared = shared
+
+        def tier(name: str) -> TieredCache:
+            return TieredCache(
+                name, shared,
+                max_bytes=settings.CACHE_L1_MAX_BYTES,
+                ttl_seconds=settings.CACHE_EXPIRY_SECONDS,
+                prefix=settings.CACHE_KEY_PREFIX,
+                beta=settings.CACHE_EARLY_EXPIRY_BETA,
+            )
+
+        self._pages = tier("search_pages")
+        self._products = tier("products")
+        self._facets = tier("facets")
+
+    def clear(self) -> None:
+        """Forget every cached page, product and facet count"""
+        for cache in (self._pages, self._products, self._facets):
+            cache.clear()
+
+    async def search(self, params: ProductSearchParams, sort: Optional[str], after: After,
+                     offset: int, limit: int, include_total: bool) -> SearchPage:
+        key = f"{params.cache_key()}|{sort}|{after}|{offset}|{limit}|{int(include_total)}"
+
+        async def compute() -> bytes:
+            return _encode_page(
+                await self.backend.search(params, sort, after, offset, limit, include_total)
+            )
+
+        return _decode_page(await self._pages.fetch(key, compute))
+
+    def export(self, params: ProductSearchParams, sort: Optional[str]) -> AsyncIterator[List[bytes]]:
+        # Whole result sets are streamed, never cached
+        return self.backend.export(params, sort)
+
+    async def get(self, product_id: int) -> Optional[Tuple[bytes, str]]:
+        async def compute() -> Optional[bytes]:
+            product = await self.backend.get(product_id)
+            return None if product is None else _encode_product(*product)
+
+        value = await self._products.fetch(str(product_id), compute)
+        return None if value is None else _decode_product(value)
+
+    async def lookup(self, product_ids: List[int]) -> Dict[int, Tuple[bytes, str]]:
+        keys = [str(product_id) for product_id in dict.fromkeys(product_ids)]
+        cached = await self._products.get_many(keys)
+        products = {int(key): _decode_product(value) for key, value in cached.items()}
+
+        missing = [int(key) for key in keys if key not in cached]
+        if missing:
+            start_time = time.perf_counter()
+            fetched = await self.backend.lookup(missing)
+            # Charge each product its share of the batch for early expiry
+            delta = (time.perf_counter() - start_time) / len(missing)
+            self._products.set_many(
+                {str(product_id): _encode_product(*product) for product_id, product in fetched.items()},
+                delta,
+            )
+            products.update(fetched)
+        return products
+
+    async def facets(self, params: ProductSearchParams) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        async def compute() -> bytes:
+            return json.dumps(await self.backend.facets(params)).encode("utf-8")
+
+        total, counts = json.loads(await self._facets.fetch(params.cache_key(), compute))
+        return total, counts
+
+    def category_label(self, category: str) -> Optional[str]:
+        return self.backend.category_label(category)
+
+    def categories(self) -> List[str]:
+        return self.backend.categories()
+
+    def subcategories(self, category: Optional[str] = None) -> List[str]:
+        return self.backend.subcategories(category)
+
+    def brands(self) -> List[str]:
+        return self.backend.brands()
+
+    def colors(self) -> List[str]:
+        return self.backend.colors()
+
+    def suggest(self, prefix: str, limit: int) -> bytes:
+        return self.backend.suggest(prefix, limit)
+
+    async def close(self) -> None:
+        for cache in (self._pages, self._products, self._facets):
+            await cache.flush()
+        if self._shared is not None:
+            await self._shared.close()
+        await self.backend.close()
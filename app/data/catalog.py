@@ -0,0 +1,69 @@
+"""
+In-memory product catalog with the search indexes built at load time
+"""
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+from app.core.config import settings
+from app.data.bitmaps import BitmapIndex
+from app.data.columns import ProductColumns
+from app.data.facets import FacetIndex
+from app.data.generator import configured_products
+from app.data.index import TextIndex
+from app.data.payloads import PayloadCache
+from app.data.ranking import RelevanceIndex
+from app.data.records import compact
+from app.data.sorted_index import SortedIndex
+from app.data.suggest import SuggestIndex, suggestion_entries
+
+
+class Catalog:
+    """Product list plus the indexes derived from it"""
+
+    def __init__(self, products: Iterable[Dict[str, Any]]):
+        self._listeners: List[Callable[[], None]] = []
+        self._build(products)
+
+    def _build(self, products: Iterable[Dict[str, Any]]):
+        # Slotted records with shared strings and compressed text, unless disabled
+        products = compact(products) if settings.COMPACT_CATALOG else list(products)
+        self.products: List[Mapping[str, Any]] = products
+        self.positions_by_id: Dict[int, int] = {p["id"]: i for i, p in enumerate(products)}
+        self.text_index = TextIndex(products)
+        self.columns = ProductColumns(products)
+        self.bitmaps = BitmapIndex(self.columns)
+        self.sorted = SortedIndex(self.columns)
+        self.facets = FacetIndex(self.columns)
+        self.ranking = RelevanceIndex(products)
+        self.suggestions = SuggestIndex(suggestion_entries(products))
+
+        # Distinct values for the filter option endpoints
+        self.categories = sorted(set(p["category"] for p in products))
+        self.subcategories = sorted(set(p["subcategory"] for p in products))
+        self.brands = sorted(set(p["brand"] for p in products))
+        self.colors = sorted(set(color for p in products for color in p["color"]))
+        by_category: Dict[str, set] = {}
+        for p in products:
+            by_category.setdefault(p["category"].lower(), set()).add(p["subcategory"])
+        self.subcategories_by_category = {k: sorted(v) for k, v in by_category.items()}
+        self.payloads = PayloadCache(products)
+
+    def load(self, products: Iterable[Dict[str, Any]]):
+        """Replace the catalog contents, rebuild every index and notify listeners"""
+        payloads = self.payloads
+        self._build(products)
+        payloads.clear()
+        for listener in self._listeners:
+            listener()
+
+    def on_change(self, listener: Callable[[], None]):
+        """Register a callback invoked whenever the catalog is reloaded"""
+        self._listeners.append(listener)
+
+    def get(self, product_id: int) -> Optional[Mapping[str, Any]]:
+        """Look up a product by id in O(1)"""
+        position = self.positions_by_id.get(product_id)
+        return None if position is None else self.products[position]
+
+
+# The bundled sample products, or a generated catalog file (app.data.generator)
+catalog = Catalog(configured_products())
@@ -0,0 +1,54 @@
+"""
+Columnar, NumPy-backed view of the product catalog for vectorized filtering
+"""
+from typing import Any, Dict, List, Mapping, Tuple
+
+import numpy as np
+
+
+def _encode(values: List[str]) -> Tuple[np.ndarray, Dict[str, int], List[str]]:
+    """
+    Integer-code case-insensitive string values
+
+    Returns the codes, the lowercase value to code vocabulary, and the
+    first-seen spelling of each code for display.
+    """
+    vocabulary: Dict[str, int] = {}
+    labels: List[str] = []
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        key = value.lower()
+        code = vocabulary.get(key)
+        if code is None:
+            code = vocabulary[key] = len(labels)
+            labels.append(value)
+        codes[i] = code
+    return codes, vocabulary, labels
+
+
+class ProductColumns:
+    """
+    Struct-of-arrays representation of the catalog.
+
+    The numeric columns feed the sorted price and rating indexes, and the
+    integer-coded categorical columns feed the facet bitmap indexes.
+    """
+
+    def __init__(self, products: List[Mapping[str, Any]]):
+        self.size = len(products)
+        self.price = np.fromiter((p["price"] for p in products), dtype=np.float64, count=self.size)
+        self.rating = np.fromiter((p["rating"] for p in products), dtype=np.float64, count=self.size)
+        self.availability = np.fromiter(
+            (p["availability"] for p in products), dtype=np.bool_, count=self.size
+        )
+        self.category, self.category_codes, self.category_labels = _encode([p["category"] for p in products])
+        self.subcategory, self.subcategory_codes, self.subcategory_labels = _encode([p["subcategory"] for p in products])
+        self.brand, self.brand_codes, self.brand_labels = _encode([p["brand"] for p in products])
+
+        # Colors are multi-valued: keep a flat code array plus the owning position
+        colors = [c for p in products for c in p["color"]]
+        self.color, self.color_codes, self.color_labels = _encode(colors)
+        self.color_owner = np.repeat(
+            np.arange(self.size, dtype=np.int64),
+            [len(p["color"]) for p in products],
+        )
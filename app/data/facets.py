@@ -0,0 +1,75 @@
+"""
+Facet counts over a search selection
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.data.bitmaps import Bitmap
+from app.data.columns import ProductColumns
+
+# Upper edges of the price buckets; the last bucket is open-ended
+PRICE_BUCKET_EDGES = [25, 50, 100, 250, 500, 1000, 2000]
+
+
+def _bucket_labels(edges: List[float]) -> List[str]:
+    labels, low = [], 0
+    for high in edges:
+        labels.append(f"{low}-{high}")
+        low = high
+    labels.append(f"{low}+")
+    return labels
+
+
+PRICE_BUCKET_LABELS = _bucket_labels(PRICE_BUCKET_EDGES)
+
+
+def _named_counts(counts: np.ndarray, labels: List[str]) -> Dict[str, int]:
+    """Non-zero counts keyed by label, largest first"""
+    order = sorted(np.flatnonzero(counts), key=lambda code: (-counts[code], labels[code]))
+    return {labels[code]: int(counts[code]) for code in order}
+
+
+class FacetIndex:
+    """
+    Counts per category, subcategory, brand, color, availability and price
+    bucket for a selection.
+
+    All facets are computed in one pass over the matching positions with
+    ``np.bincount`` on the integer-coded columns, and the unfiltered counts
+    are computed once per catalog load.
+    """
+
+    def __init__(self, columns: ProductColumns):
+        self._columns = columns
+        self._price_buckets = np.searchsorted(PRICE_BUCKET_EDGES, columns.price, side="right")
+        self._price_labels = PRICE_BUCKET_LABELS
+        self._unfiltered: Optional[Dict[str, Dict[str, int]]] = None
+
+    def _count(self, positions: Optional[np.ndarray], colors: np.ndarray) -> Dict[str, Dict[str, int]]:
+        columns = self._columns
+
+        def bincount(column: np.ndarray, labels: List[str]) -> Dict[str, int]:
+            values = column if positions is None else column[positions]
+            return _named_counts(np.bincount(values, minlength=len(labels)), labels)
+
+        return {
+            "category": bincount(columns.category, columns.category_labels),
+            "subcategory": bincount(columns.subcategory, columns.subcategory_labels),
+            "brand": bincount(columns.brand, columns.brand_labels),
+            "color": _named_counts(
+                np.bincount(colors, minlength=len(columns.color_labels)), columns.color_labels
+            ),
+            "availability": bincount(columns.availability.astype(np.intp), ["false", "true"]),
+            "price": bincount(self._price_buckets, self._price_labels),
+        }
+
+    def counts(self, selection: Optional[Bitmap]) -> Dict[str, Dict[str, int]]:
+        """Facet counts for ``selection``, or for the whole catalog if None"""
+        if selection is None:
+            if self._unfiltered is None:
+                self._unfiltered = self._count(None, self._columns.color)
+            return self._unfiltered
+
+        colors = self._columns.color[selection.contains(self._columns.color_owner)]
+        return self._count(selection.positions(), colors)
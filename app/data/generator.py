@@ -0,0 +1,207 @@
+"""
+Deterministic synthetic catalog generator
+
+Produces products shaped like ``app.data.products`` at any size, with skewed
+(Zipf-like) category and brand popularity, log-normal prices around a
+per-subcategory median, ratings clustered around 4.3, a few colors per
+product and descriptions of varying length. The same seed always yields
+the same catalog.
+
+Usage:
+    python -m app.data.generator --count 1000000 --output catalog.ndjson.gz [--seed 42]
+
+Boot the app against the file with ``CATALOG_PATH=catalog.ndjson.gz``.
+"""
+import argparse
+import gzip
+import math
+import random
+import time
+from typing import Any, Dict, Iterable, Iterator, List
+
+from app.core.config import settings
+from app.data.payloads import dumps, loads
+
+# category -> subcategory -> (median price, brands by popularity, specification fields)
+TAXONOMY: Dict[str, Dict[str, tuple]] = {
+    "Electronics": {
+        "Smartphones": (699, ["Samsung", "Apple", "Google", "OnePlus", "Xiaomi", "Motorola", "Nokia"],
+                        ["display", "processor", "ram", "storage", "camera", "battery"]),
+        "Laptops": (1199, ["Apple", "Dell", "Lenovo", "HP", "Asus", "Acer", "Microsoft"],
+                    ["display", "processor", "ram", "storage", "graphics", "battery"]),
+        "Headphones": (199, ["Sony", "Bose", "Sennheiser", "Apple", "JBL", "Audio-Technica"],
+                       ["type", "noise_cancellation", "battery_life", "connectivity"]),
+        "Earbuds": (149, ["Apple", "Samsung", "Bose", "Sony", "Jabra", "Anker"],
+                    ["noise_cancellation", "battery_life", "water_resistance", "connectivity"]),
+        "TVs": (899, ["LG", "Samsung", "Sony", "TCL", "Hisense", "Vizio"],
+                ["display", "resolution", "refresh_rate", "smart_platform"]),
+        "Cameras": (849, ["Canon", "Sony", "Nikon", "Fujifilm", "Panasonic"],
+                    ["sensor", "resolution", "lens_mount", "video"]),
+    },
+    "Clothing": {
+        "Pants": (59, ["Levi's", "Gap", "Uniqlo", "Wrangler", "H&M", "Zara"],
+                  ["material", "fit", "closure", "care"]),
+        "Outerwear": (179, ["The North Face", "Patagonia", "Columbia", "Arc'teryx", "Canada Goose"],
+                      ["material", "insulation", "water_resistance", "fit"]),
+        "Shirts": (39, ["Uniqlo", "Ralph Lauren", "H&M", "Gap", "Tommy Hilfiger"],
+                   ["material", "fit", "sleeve", "care"]),
+        "Dresses": (79, ["Zara", "H&M", "Mango", "Free People", "Reformation"],
+                    ["material", "length", "fit", "care"]),
+    },
+    "Footwear": {
+        "Running Shoes": (129, ["Nike", "Adidas", "Brooks", "Asics", "New Balance", "Hoka"],
+                          ["upper", "midsole", "drop", "weight"]),
+        "Boots": (159, ["Timberland", "Dr. Martens", "Red Wing", "Columbia", "UGG"],
+                  ["upper", "sole", "waterproof", "height"]),
+        "Sandals": (49, ["Birkenstock", "Teva", "Crocs", "Havaianas", "Chaco"],
+                    ["upper", "footbed", "sole", "closure"]),
+    },
+    "Home": {
+        "Kitchen Appliances": (119, ["Instant Pot", "KitchenAid", "Ninja", "Breville", "Cuisinart"],
+                               ["capacity", "power", "programs", "dimensions"]),
+        "Vacuum Cleaners": (349, ["Dyson", "Shark", "iRobot", "Bissell", "Roborock"],
+                            ["type", "suction_power", "battery_life", "filtration"]),
+        "Furniture": (429, ["IKEA", "Ashley", "West Elm", "Wayfair", "Herman Miller"],
+                      ["material", "dimensions", "weight_capacity", "assembly"]),
+        "Bedding": (89, ["Brooklinen", "Parachute", "Casper", "Tempur-Pedic", "Buffy"],
+                    ["material", "thread_count", "size", "care"]),
+    },
+    "Sports": {
+        "Fitness Equipment": (249, ["Bowflex", "Peloton", "NordicTrack", "Rogue", "Garmin"],
+                              ["type", "max_weight", "dimensions", "connectivity"]),
+        "Bicycles": (699, ["Trek", "Specialized", "Giant", "Cannondale", "Brompton"],
+                     ["frame", "gears", "brakes", "wheel_size"]),
+    },
+}
+
+COLORS = [
+    "Black", "White", "Silver", "Gray", "Navy", "Blue", "Red", "Green", "Beige", "Brown",
+    "Pink", "Purple", "Yellow", "Orange", "Space Black", "Midnight Blue", "Forest Green",
+    "Rose Gold", "Charcoal", "Cream", "Olive", "Burgundy", "Teal", "Lavender",
+]
+
+USAGES = [
+    "Everyday Use", "Work", "Travel", "Gaming", "Fitness", "Outdoor", "Professional",
+    "Creative Work", "Home", "Commuting", "Casual Wear", "Cooking", "Entertainment",
+]
+
+SERIES = ["Pro", "Max", "Ultra", "Lite", "Plus", "Air", "Neo", "Prime", "Classic", "Sport", "Elite", "Mini"]
+
+ADJECTIVES = [
+    "lightweight", "durable", "premium", "versatile", "compact", "powerful", "comfortable",
+    "elegant", "reliable", "innovative", "efficient", "sleek", "rugged", "responsive",
+]
+
+SENTENCES = [
+    "The {name} combines a {adj} design with {adj2} performance for {usage}.",
+    "Built by {brand}, it is made for people who expect {adj} quality every day.",
+    "Its {field} stands out in the {subcategory} range.",
+    "Customers praise how {adj} and {adj2} it feels after months of use.",
+    "Available in {colors}, it fits any style.",
+    "Backed by {brand} support, the {name} is a {adj} choice at this price.",
+    "Whether for {usage} or more, it delivers {adj} results.",
+    "Every detail, from the {field} to the finish, has been refined.",
+]
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    """Popularity weights for ranks 1..n; earlier items are more common"""
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def _product(rng: random.Random, product_id: int, categories: List[str], category_weights: List[float]) -> Dict[str, Any]:
+    category = rng.choices(categories, category_weights)[0]
+    subcategories = list(TAXONOMY[category])
+    subcategory = rng.choices(subcategories, _zipf_weights(len(subcategories), 0.8))[0]
+    median, brands, fields = TAXONOMY[category][subcategory]
+    brand = rng.choices(brands, _zipf_weights(len(brands)))[0]
+
+    series = rng.choice(SERIES)
+    name = f"{brand} {series} {rng.randint(1, 99)} {subcategory}"
+    # Log-normal around the subcategory median, ending in .99
+    price = max(4.99, math.floor(rng.lognormvariate(math.log(median), 0.45)) + 0.99)
+    rating = round(min(5.0, max(1.0, rng.gauss(4.3, 0.45))), 1)
+    colors = rng.sample(COLORS, min(len(COLORS), 1 + int(rng.expovariate(0.8))))
+    usage = ", ".join(rng.sample(USAGES, rng.randint(1, 4)))
+    specification = {field: f"{series} {field.replace('_', ' ')} {rng.randint(1, 512)}" for field in fields}
+
+    # Description length varies from one sentence to a long paragraph
+    words = {
+        "name": name, "brand": brand, "subcategory": subcategory.lower(),
+        "usage": usage.split(", ")[0].lower(), "colors": ", ".join(colors),
+    }
+    sentences = []
+    for _ in range(max(1, min(14, int(rng.lognormvariate(1.2, 0.6))))):
+        sentences.append(rng.choice(SENTENCES).format(
+            adj=rng.choice(ADJECTIVES), adj2=rng.choice(ADJECTIVES),
+            field=rng.choice(fields).replace("_", " "), **words
+        ))
+
+    return {
+        "id": product_id,
+        "name": name,
+        "category": category,
+        "subcategory": subcategory,
+        "brand": brand,
+        "price": price,
+        "specification": specification,
+        "availability": rng.random() < 0.85,
+        "rating": rating,
+        "color": colors,
+        "usage": usage,
+        "description": " ".join(sentences),
+    }
+
+
+def generate(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` products with IDs 1..count"""
+    rng = random.Random(seed)
+    categories = list(TAXONOMY)
+    category_weights = _zipf_weights(len(categories), 0.7)
+    for product_id in range(1, count + 1):
+        yield _product(rng, product_id, categories, category_weights)
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, compresslevel=6)
+    return open(path, mode)
+
+
+def write_catalog(path: str, count: int, seed: int = 42) -> None:
+    """Stream a generated catalog to ``path`` as NDJSON (gzipped if it ends in .gz)"""
+    with _open(path, "wb") as f:
+        for product in generate(count, seed):
+            f.write(dumps(product) + b"\n")
+
+
+def read_catalog(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream the products of an NDJSON catalog written by ``write_catalog``"""
+    with _open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def configured_products() -> Iterable[Dict[str, Any]]:
+    """The catalog file named by CATALOG_PATH (streamed), or the bundled sample"""
+    if settings.CATALOG_PATH:
+        return read_catalog(settings.CATALOG_PATH)
+    from app.data.products import products
+    return products
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000, help="number of products")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="catalog.ndjson.gz", help="NDJSON file, gzipped if it ends in .gz")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_catalog(args.output, args.count, args.seed)
+    print(f"Wrote {args.count} products to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
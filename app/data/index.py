@@ -0,0 +1,197 @@
+"""
+Inverted n-gram index for product text search
+"""
+from typing import Any, Dict, Iterator, List, Mapping, Tuple
+
+import numpy as np
+
+from app.data.bitmaps import Bitmap
+
+# Products whose n-grams are extracted per vectorized build step (a multiple of 8)
+_BUILD_CHUNK = 8192
+
+# Postings covering at least this share of the catalog are kept as packed bitmaps
+_DENSE_FRACTION = 1 / 32
+
+# Bits per character of an n-gram key, enough for every code point plus one
+_CHAR_BITS = 21
+
+# Pad characters after each text, so every character starts a trigram
+_PAD = 2
+
+# Part of a posting from one build chunk: (chunk number, positions or chunk-local bits)
+Piece = Tuple[int, np.ndarray]
+
+
+def _codes(text: str) -> np.ndarray:
+    """Code points of ``text`` plus one, so NUL padding (1) differs from no character (0)"""
+    return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32).astype(np.int64) + 1
+
+
+def _key(gram: str) -> int:
+    """Key of a one- to three-character n-gram; shorter ones leave the trailing characters 0"""
+    key = 0
+    for i, code in enumerate(_codes(gram).tolist()):
+        key |= code << (_CHAR_BITS * (2 - i))
+    return key
+
+
+def _contains(posting: np.ndarray, positions: np.ndarray, size: int) -> np.ndarray:
+    """Membership mask of ``positions`` in a posting"""
+    if posting.dtype == np.uint8:
+        return Bitmap(posting, size).contains(positions)
+    index = np.minimum(np.searchsorted(posting, positions), len(posting) - 1)
+    return posting[index] == positions
+
+
+class TextIndex:
+    """
+    Inverted index mapping lowercase n-grams to the catalog positions of the
+    products whose name or description contains them.
+
+    Every text is indexed with two pad characters after it, so each of its
+    characters starts a trigram and the products containing a one- or
+    two-character string are the union of the trigrams it prefixes, stored
+    alongside them: a query of up to three characters is one exact posting.
+    Longer queries intersect the postings of their trigrams, smallest first,
+    and verify the candidates against the product records, so results are
+    identical to ``query in name.lower() or query in description.lower()``.
+
+    Postings are sorted ``int32`` positions, or packed bits once they cover
+    ``_DENSE_FRACTION`` of the catalog; no copy of the text is kept. Trigrams
+    are extracted with NumPy, ``_BUILD_CHUNK`` products at a time.
+    """
+
+    NGRAM_SIZE = 3
+
+    def __init__(self, products: List[Mapping[str, Any]]):
+        self._products = products
+        self.size = len(products)
+        self._postings: Dict[int, np.ndarray] = {}
+
+        pieces: Dict[int, List[Piece]] = {}
+        for number, start in enumerate(range(0, self.size, _BUILD_CHUNK)):
+            for key, piece in self._chunk_postings(products[start:start + _BUILD_CHUNK], number):
+                pieces.setdefault(key, []).append(piece)
+        for key in sorted(pieces):
+            self._postings[key] = self._merge(pieces.pop(key))
+
+        # Two- then one-character postings: the union of the longer n-grams they prefix
+        for shift in (_CHAR_BITS, 2 * _CHAR_BITS):
+            groups: Dict[int, List[Piece]] = {}
+            for key, posting in self._postings.items():
+                # Group the n-grams one character longer than the ones being built
+                if key & ((1 << shift) - 1) and not key & ((1 << (shift - _CHAR_BITS)) - 1):
+                    groups.setdefault(key >> shift << shift, []).append((-1, posting))
+            for key, group in groups.items():
+                self._postings[key] = self._merge(group)
+
+    def _chunk_postings(self, chunk: List[Mapping[str, Any]], number: int) -> Iterator[Tuple[int, Piece]]:
+        """``(trigram key, piece)`` for every trigram in one build chunk"""
+        texts = [text.lower() for product in chunk for text in (product["name"], product["description"])]
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+        codes = _codes("".join(text + "\0" * _PAD for text in texts))
+
+        # Start of every real (not pad) character, and the chunk-local product it belongs to
+        spans = lengths + _PAD
+        offsets = np.arange(len(codes)) - np.repeat(np.cumsum(spans) - spans, spans)
+        starts = np.flatnonzero(offsets < np.repeat(lengths, spans))
+        owners = np.repeat(np.arange(len(texts)) // 2, lengths)
+
+        keys = codes[starts] << (2 * _CHAR_BITS) | codes[starts + 1] << _CHAR_BITS | codes[starts + 2]
+        order = np.lexsort((owners, keys))
+        keys, owners = keys[order], owners[order]
+        distinct = np.ones(len(keys), dtype=np.bool_)
+        distinct[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+        keys, owners = keys[distinct], owners[distinct]
+
+        bounds = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1], [True]]))
+        dense = max(1, int(len(chunk) * _DENSE_FRACTION))
+        for begin, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            local = owners[begin:end]
+            if len(local) >= dense:
+                mask = np.zeros(len(chunk), dtype=np.bool_)
+                mask[local] = True
+                yield int(keys[begin]), (number, np.packbits(mask, bitorder="little"))
+            else:
+                yield int(keys[begin]), (number, (local + number * _BUILD_CHUNK).astype(np.int32))
+
+    def _merge(self, pieces: List[Piece]) -> np.ndarray:
+        """
+        One posting from pieces in position order (chunk -1 marks a whole posting)
+
+        Positions are set in a mask, chunk bits copied to their byte offset
+        (chunks start on byte boundaries) and whole bitmaps ORed in; the
+        result is packed bits if dense, else sorted positions.
+        """
+        bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        mask = np.zeros(self.size, dtype=np.bool_)
+        for number, piece in pieces:
+            if piece.dtype == np.int32:
+                mask[piece] = True
+            elif number < 0:
+                np.bitwise_or(bits, piece, out=bits)
+            else:
+                offset = number * _BUILD_CHUNK // 8
+                np.bitwise_or(bits[offset:offset + len(piece)], piece, out=bits[offset:offset + len(piece)])
+        np.bitwise_or(bits, np.packbits(mask, bitorder="little"), out=bits)
+
+        posting = Bitmap(bits, self.size)
+        if posting.count() >= max(1, self.size * _DENSE_FRACTION):
+            return bits
+        return posting.positions().astype(np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the posting arrays"""
+        return sum(posting.nbytes for posting in self._postings.values())
+
+    def select(self, query: str) -> Bitmap:
+        """Bitmap of the catalog positions whose name or description contains ``query``"""
+        query = query.lower()
+        if not query:
+            return Bitmap.full(self.size)
+        if "\0" in query:
+            return Bitmap.empty(self.size)
+
+        if len(query) <= self.NGRAM_SIZE:
+            posting = self._postings.get(_key(query))
+            if posting is None:
+                return Bitmap.empty(self.size)
+            if posting.dtype == np.uint8:
+                return Bitmap(posting.copy(), self.size)
+            return Bitmap.from_positions(posting, self.size)
+
+        postings = []
+        for gram in {query[i:i + self.NGRAM_SIZE] for i in range(len(query) - self.NGRAM_SIZE + 1)}:
+            posting = self._postings.get(_key(gram))
+            if posting is None:
+                return Bitmap.empty(self.size)
+            postings.append(posting)
+
+        sparse = sorted((p for p in postings if p.dtype == np.int32), key=len)
+        dense = [p for p in postings if p.dtype == np.uint8]
+        if sparse:
+            # Filter the smallest position list through every other posting
+            candidates = sparse[0]
+            for posting in sparse[1:] + dense:
+                candidates = candidates[_contains(posting, candidates, self.size)]
+                if not len(candidates):
+                    return Bitmap.empty(self.size)
+        else:
+            bits = dense[0].copy()
+            for posting in dense[1:]:
+                np.bitwise_and(bits, posting, out=bits)
+            candidates = Bitmap(bits, self.size).positions()
+
+        # Trigrams can match out of order; confirm the substring, checking the name before decoding the description
+        products = self._products
+        matches = [
+            position for position in candidates.tolist()
+            if query in products[position]["name"].lower() or query in products[position]["description"].lower()
+        ]
+        return Bitmap.from_positions(matches, self.size)
+
+    def search(self, query: str) -> np.ndarray:
+        """Return catalog positions matching ``query``, in catalog order"""
+        return self.select(query).positions()
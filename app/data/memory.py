@@ -0,0 +1,209 @@
+"""
+Product repository over the in-memory catalog and its indexes
+"""
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.models import ProductSearchParams
+from app.core.singleflight import SingleFlight
+from app.data.bitmaps import Bitmap
+from app.data.catalog import catalog
+from app.data.pagination import encode_cursor, take
+from app.data.payloads import PayloadCache
+from app.data.repository import After, ProductRepository, SearchPage, StaleCursor
+
+# Filter results keyed by canonical search parameters, dropped on catalog reload
+search_cache = TTLCache(
+    "search",
+    max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+    ttl_seconds=settings.CACHE_EXPIRY_SECONDS
+)
+catalog.on_change(search_cache.clear)
+
+# Identical concurrent searches and lookups share one in-flight computation
+search_flight = SingleFlight("search")
+product_flight = SingleFlight("product")
+
+
+def _export_batches(chunks: Iterator[np.ndarray], payloads: PayloadCache, size: int) -> Iterator[List[bytes]]:
+    """Regroup a stream of position chunks into lists of ``size`` product payloads"""
+    positions: List[int] = []
+    for chunk in chunks:
+        positions.extend(chunk.tolist())
+        while len(positions) >= size:
+            yield [payloads.encode(position) for position in positions[:size]]
+            del positions[:size]
+    if positions:
+        yield [payloads.encode(position) for position in positions]
+
+
+class InMemoryRepository(ProductRepository):
+    """
+    Serves the process-local ``catalog``
+
+    Filters are answered from bitmap, sorted and n-gram indexes; the
+    resulting selection is cached per filter combination and paged lazily,
+    and product JSON comes from the catalog's payload cache.
+    """
+
+    async def search(self, params: ProductSearchParams, sort: Optional[str], after: After,
+                     offset: int, limit: int, include_total: bool) -> SearchPage:
+        # Resolve the cursor to the catalog position of the last product returned
+        position = None
+        if after is not None:
+            cursor_key, cursor_id = after
+            position = catalog.positions_by_id.get(cursor_id)
+            if position is None:
+                raise StaleCursor(cursor_id)
+
+        # Search products, serving repeated filter combinations from the cache
+        results = await self._selection(params)
+
+        scores = None
+        if sort == "relevance":
+            # Only the best offset + limit + 1 matches after the cursor are ranked
+            window, scores = catalog.ranking.rank(
+                params.query or "", results, offset + limit + 1,
+                None if position is None else (cursor_key, position)
+            )
+            window, scores = window[offset:], scores[offset:]
+        elif sort:
+            # Lazily walk the matches from the cursor, stopping once the page is full
+            chunks = catalog.sorted.iter_matches(
+                results, sort, params, None if position is None else (cursor_key, position)
+            )
+            window = take(chunks, offset, limit + 1)
+        else:
+            window = take(results.iter_positions(0 if position is None else position + 1), offset, limit + 1)
+        page = window[:limit]
+
+        next_cursor = None
+        if len(window) > limit:
+            last = int(page[-1])
+            if scores is not None:
+                key = float(scores[limit - 1])
+            else:
+                key = catalog.sorted.key(sort, last) if sort else None
+            next_cursor = encode_cursor(sort, key, catalog.products[last]["id"])
+
+        # Only count every match when the client asks for it
+        total = results.count() if include_total else None
+        return SearchPage(catalog.payloads.array(page), len(page), total, next_cursor)
+
+    async def export(self, params: ProductSearchParams, sort: Optional[str]) -> AsyncIterator[List[bytes]]:
+        results = await self._selection(params)
+        # Keep this catalog's indexes even if it is reloaded mid-export
+        sorted_index, payloads = catalog.sorted, catalog.payloads
+        chunks = sorted_index.iter_matches(results, sort, params) if sort else results.iter_positions()
+        # Products are encoded without touching the payload cache, so an export cannot flush it
+        batches = _export_batches(chunks, payloads, settings.EXPORT_BATCH_SIZE)
+        while True:
+            batch = await run_in_threadpool(next, batches, None)
+            if batch is None:
+                return
+            yield batch
+
+    async def _selection(self, params: ProductSearchParams) -> Bitmap:
+        """Bitmap of matches for ``params``, from the result cache or a coalesced search"""
+        cache_key = params.cache_key()
+        results = search_cache.get(cache_key) if settings.SEARCH_CACHE_ENABLED else None
+        if results is None:
+            results = await search_flight.do(
+                cache_key, lambda: run_in_threadpool(self._compute, params, cache_key)
+            )
+        return results
+
+    def _compute(self, params: ProductSearchParams, cache_key: str) -> Bitmap:
+        """Run a search and store the resulting bitmap in the result cache"""
+        results = self.select(params)
+        if settings.SEARCH_CACHE_ENABLED:
+            search_cache.set(cache_key, results, results.nbytes + len(cache_key))
+        return results
+
+    def select(self, params: ProductSearchParams) -> Bitmap:
+        """
+        Search products based on provided parameters
+
+        Returns a bitmap of matching catalog positions.
+        """
+        size = catalog.columns.size
+
+        # Facet filters are answered by ANDing the precomputed bitmaps
+        selection = catalog.bitmaps.select(params)
+        if selection is None:
+            selection = Bitmap.full(size)
+
+        # Price and rating ranges are binary searches over the sorted indexes
+        ranges = catalog.sorted.range_filter(params)
+        if ranges is not None:
+            selection &= ranges
+
+        # Text search in name and description via the n-gram index
+        if params.query:
+            selection &= catalog.text_index.select(params.query)
+
+        return selection
+
+    async def get(self, product_id: int) -> Optional[Tuple[bytes, str]]:
+        position = catalog.positions_by_id.get(product_id)
+        if position is None:
+            return None
+        payload = catalog.payloads.cached(position)
+        if payload is None:
+            payload = await product_flight.do(
+                product_id, lambda: run_in_threadpool(catalog.payloads.store, position)
+            )
+        return payload, catalog.products[position]["category"]
+
+    async def get_many(self, product_ids: List[int]) -> Tuple[bytes, List[int]]:
+        found, missing = [], []
+        for product_id in product_ids:
+            position = catalog.positions_by_id.get(product_id)
+            if position is None:
+                missing.append(product_id)
+            else:
+                found.append(position)
+        return catalog.payloads.array(found), missing
+
+    async def lookup(self, product_ids: List[int]) -> Dict[int, Tuple[bytes, str]]:
+        products = {}
+        for product_id in product_ids:
+            position = catalog.positions_by_id.get(product_id)
+            if position is not None:
+                products[product_id] = (catalog.payloads.get(position), catalog.products[position]["category"])
+        return products
+
+    async def facets(self, params: ProductSearchParams) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        if not params.cache_key():
+            # Unfiltered counts are precomputed once per catalog load
+            return catalog.columns.size, catalog.facets.counts(None)
+
+        results = await self._selection(params)
+        counts = await run_in_threadpool(catalog.facets.counts, results)
+        return results.count(), counts
+
+    def category_label(self, category: str) -> Optional[str]:
+        code = catalog.columns.category_codes.get(category.lower())
+        return None if code is None else catalog.columns.category_labels[code]
+
+    def categories(self) -> List[str]:
+        return catalog.categories
+
+    def subcategories(self, category: Optional[str] = None) -> List[str]:
+        if category:
+            return catalog.subcategories_by_category.get(category.lower(), [])
+        return catalog.subcategories
+
+    def brands(self) -> List[str]:
+        return catalog.brands
+
+    def colors(self) -> List[str]:
+        return catalog.colors
+
+    def suggest(self, prefix: str, limit: int) -> bytes:
+        return catalog.suggestions.suggest(prefix, limit)
@@ -0,0 +1,67 @@
+"""
+Opaque keyset cursors and lazy, early-terminating result windows
+"""
+import base64
+import json
+import math
+from typing import Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def encode_cursor(sort: Optional[str], key: Optional[float], product_id: int) -> str:
+    """Opaque cursor for the page following the product ``product_id`` with sort key ``key``"""
+    raw = json.dumps({"s": sort, "k": key, "id": product_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _is_number(value: Any) -> bool:
+    # bool is an int subclass, but never a valid key or id
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, sort: Optional[str]) -> Tuple[Optional[float], int]:
+    """
+    Decode a cursor into ``(sort key, product id)``
+
+    Raises ValueError if the cursor is malformed or was issued for a
+    different sort order.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        issued_for, key, product_id = data.get("s"), data["k"], data["id"]
+        if not _is_number(product_id) or not isinstance(product_id, int) or abs(product_id) >= 2**63:
+            raise TypeError("Cursor id is not a 64-bit integer")
+        # Sorted cursors carry the finite sort key of their product; catalog order has none
+        if issued_for is None:
+            if key is not None:
+                raise TypeError("Unsorted cursor has a sort key")
+        elif not _is_number(key) or not math.isfinite(key):
+            raise TypeError("Cursor sort key is not a finite number")
+    except (ValueError, TypeError, KeyError, AttributeError, OverflowError) as e:
+        raise ValueError("Malformed cursor") from e
+    if issued_for != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    if key is not None:
+        key = float(key)
+    return key, product_id
+
+
+def take(chunks: Iterable[np.ndarray], skip: int, count: int) -> np.ndarray:
+    """
+    Positions ``skip:skip + count`` of a lazy stream of position chunks
+
+    Only as many chunks as needed are pulled from the generator, so the
+    work done is proportional to the page depth, not the result size.
+    """
+    needed = skip + count
+    found, matched = [], 0
+    for chunk in chunks:
+        found.append(chunk)
+        matched += len(chunk)
+        if matched >= needed:
+            break
+    if not found:
+        return np.empty(0, dtype=np.intp)
+    return np.concatenate(found)[skip:needed]
@@ -0,0 +1,75 @@
+"""
+Pre-validated, pre-serialized product JSON payloads
+"""
+import json
+import math
+from typing import Any, Iterable, List, Mapping, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.models import Product
+
+# orjson is optional; fall back to the stdlib encoder when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bytes object, LRU entry and tuple overhead per cached payload, roughly
+_ENTRY_OVERHEAD = 120
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode ``obj`` as compact UTF-8 JSON, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class PayloadCache:
+    """
+    Validates catalog products against the ``Product`` model and keeps their
+    JSON encoding, so list and detail responses are assembled by joining
+    cached bytes instead of rebuilding Pydantic models per request.
+
+    Encodings live in an LRU bounded by ``PAYLOAD_CACHE_MAX_BYTES``, so only
+    the products being browsed are held twice, not the whole catalog.
+    """
+
+    def __init__(self, products: List[Mapping[str, Any]]):
+        self._products = products
+        # Products do not change within a catalog load, so entries never expire
+        self._cache = TTLCache("payloads", max_bytes=settings.PAYLOAD_CACHE_MAX_BYTES, ttl_seconds=math.inf)
+
+    def cached(self, position: int) -> Optional[bytes]:
+        """JSON bytes for the product at ``position`` if already encoded"""
+        return self._cache.get(position)
+
+    def encode(self, position: int) -> bytes:
+        """Validate and encode the product at ``position``, without caching it"""
+        return dumps(Product.model_validate(self._products[position]).model_dump())
+
+    def store(self, position: int) -> bytes:
+        """Encode the product at ``position`` and cache the result"""
+        payload = self.encode(position)
+        self._cache.set(position, payload, len(payload) + _ENTRY_OVERHEAD)
+        return payload
+
+    def get(self, position: int) -> bytes:
+        """JSON bytes for the product at ``position``, from the cache or freshly encoded"""
+        payload = self._cache.get(position)
+        return self.store(position) if payload is None else payload
+
+    def array(self, positions: Iterable[int]) -> bytes:
+        """JSON array of the products at ``positions``"""
+        return b"[" + b",".join([self.get(p) for p in positions]) + b"]"
+
+    def clear(self) -> None:
+        self._cache.clear()
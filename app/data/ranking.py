@@ -0,0 +1,184 @@
+"""
+BM25F relevance ranking for text queries
+"""
+import bisect
+import re
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.data.bitmaps import Bitmap
+from app.data.pagination import take
+
+# Field boosts: a query word in the name counts three times one in the description
+FIELD_WEIGHTS = (("name", 3.0), ("brand", 2.0), ("description", 1.0))
+
+# BM25 term-frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# Precomputed impacts are quantized to 1..IMPACT_LEVELS
+IMPACT_LEVELS = 255
+
+# Total postings at or above which scores are accumulated into a dense array
+# rather than merged by sorting, as a fraction of the catalog size
+_DENSE_FRACTION = 0.125
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of ``text``"""
+    return _WORD.findall(text.lower())
+
+
+class RelevanceIndex:
+    """
+    Impact-ordered inverted index over product name, brand and description
+
+    At load time every (term, product) pair gets its BM25F contribution:
+    the boosted, length-normalized term frequencies of the three fields are
+    summed, saturated with ``K1`` and weighted by the term's IDF. Impacts
+    are quantized to a byte, so a query score is a sum of small integers
+    (ties are exact and cursors round-trip through JSON), and postings that
+    round to zero, i.e. words in nearly every product, are dropped.
+
+    A query adds up the postings of its words, the last one also matching
+    as a prefix so partially typed words rank, and keeps only the top
+    ``count`` products by partial selection instead of sorting every match.
+    Matches that share no word with the query rank after every scored one,
+    in catalog order.
+    """
+
+    def __init__(self, products: Iterable[Mapping[str, Any]]):
+        terms: Dict[str, int] = {}
+        term_ids, positions = array("i"), array("i")
+        frequencies = [array("B") for _ in FIELD_WEIGHTS]
+        lengths = [array("i") for _ in FIELD_WEIGHTS]
+
+        for position, product in enumerate(products):
+            counts: Dict[str, List[int]] = {}
+            for field, (name, _) in enumerate(FIELD_WEIGHTS):
+                words = tokenize(product[name])
+                lengths[field].append(len(words))
+                for word in words:
+                    counts.setdefault(word, [0] * len(FIELD_WEIGHTS))[field] += 1
+            for word, per_field in counts.items():
+                term_ids.append(terms.setdefault(word, len(terms)))
+                positions.append(position)
+                for field, frequency in enumerate(per_field):
+                    frequencies[field].append(min(frequency, 255))
+
+        self.size = len(lengths[0])
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        postings = np.asarray(positions, dtype=np.int32)
+
+        # BM25F pseudo-frequency: boosted field frequencies, each normalized by field length
+        pseudo = np.zeros(len(postings))
+        for field, (_, weight) in enumerate(FIELD_WEIGHTS):
+            field_lengths = np.asarray(lengths[field], dtype=np.float64)
+            average = field_lengths.mean() if self.size else 0.0
+            norms = 1 - B + B * field_lengths / (average or 1.0)
+            pseudo += weight * np.asarray(frequencies[field], dtype=np.float64) / norms[postings]
+
+        document_frequency = np.bincount(term_ids, minlength=len(terms))
+        idf = np.log(1 + (self.size - document_frequency + 0.5) / (document_frequency + 0.5))
+        impacts = idf[term_ids] * pseudo * (K1 + 1) / (K1 + pseudo)
+        scale = IMPACT_LEVELS / impacts.max() if len(impacts) and impacts.max() > 0 else 0.0
+        quantized = np.rint(impacts * scale).astype(np.uint8)
+
+        # Group postings by term (positions stay ascending within a term), dropping zero impacts
+        keep = quantized > 0
+        order = np.argsort(term_ids[keep], kind="stable")
+        self._positions = postings[keep][order]
+        self._impacts = quantized[keep][order]
+        self._offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids[keep], minlength=len(terms)), out=self._offsets[1:])
+
+        # Sorted vocabulary for prefix expansion of the last query word
+        self._vocabulary = sorted(terms)
+        self._vocabulary_ids = np.array([terms[word] for word in self._vocabulary], dtype=np.int64)
+        self._terms = terms
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the postings arrays"""
+        return self._positions.nbytes + self._impacts.nbytes + self._offsets.nbytes
+
+    def terms(self, query: str) -> List[int]:
+        """Term IDs for the words of ``query``, the last word expanded to every term it prefixes"""
+        words = tokenize(query)
+        if not words:
+            return []
+        ids = {self._terms[word] for word in words[:-1] if word in self._terms}
+        start = bisect.bisect_left(self._vocabulary, words[-1])
+        stop = bisect.bisect_left(self._vocabulary, words[-1] + "\U0010ffff", start)
+        ids.update(self._vocabulary_ids[start:stop].tolist())
+        return sorted(ids)
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Ascending positions with a non-zero score for ``query``, and their scores"""
+        slices = [slice(self._offsets[term], self._offsets[term + 1]) for term in self.terms(query)]
+        if not slices:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        if len(slices) == 1:
+            return self._positions[slices[0]], self._impacts[slices[0]].astype(np.float64)
+
+        positions = np.concatenate([self._positions[s] for s in slices])
+        impacts = np.concatenate([self._impacts[s] for s in slices])
+        if len(positions) >= self.size * _DENSE_FRACTION:
+            totals = np.bincount(positions, weights=impacts, minlength=self.size)
+            scored = np.flatnonzero(totals)
+            return scored, totals[scored]
+        scored, inverse = np.unique(positions, return_inverse=True)
+        return scored, np.bincount(inverse, weights=impacts)
+
+    def rank(self, query: str, selection: Bitmap, count: int,
+             after: Optional[Tuple[float, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The first ``count`` positions of ``selection`` in relevance order
+        (score descending, then catalog order) and their scores
+
+        ``after`` is the ``(score, position)`` of the last product already
+        returned; only products ranked strictly after it are included.
+        """
+        scored, scores = self.scores(query)
+        if len(scored):
+            matching = selection.contains(scored)
+            scored, scores = scored[matching], scores[matching]
+
+        positions, keys, tail_start = scored, scores, 0
+        if after is not None:
+            key, last = after
+            if key > 0:
+                later = (scores < key) | ((scores == key) & (scored > last))
+                positions, keys = scored[later], scores[later]
+            else:
+                positions, keys = scored[:0], scores[:0]
+                # Unscored products rank as 0, so they follow a cursor at exactly 0, never a lower one
+                tail_start = last + 1 if key == 0 else self.size
+
+        # Partial selection: keep everything scoring at least the count-th best, then order only those
+        if len(positions) > count > 0:
+            threshold = np.partition(keys, len(keys) - count)[len(keys) - count]
+            top = keys >= threshold
+            positions, keys = positions[top], keys[top]
+        order = np.lexsort((positions, -keys))[:count]
+        positions, keys = positions[order], keys[order]
+
+        if len(positions) < count:
+            tail = take(self._unscored(selection, scored, tail_start), 0, count - len(positions))
+            positions = np.concatenate([positions, tail])
+            keys = np.concatenate([keys, np.zeros(len(tail))])
+        return positions, keys
+
+    @staticmethod
+    def _unscored(selection: Bitmap, scored: np.ndarray, start: int) -> Iterator[np.ndarray]:
+        """Lazily yield positions of ``selection`` from ``start`` that are not in ``scored``"""
+        for chunk in selection.iter_positions(start):
+            if len(scored):
+                index = np.minimum(np.searchsorted(scored, chunk), len(scored) - 1)
+                chunk = chunk[scored[index] != chunk]
+            if len(chunk):
+                yield chunk
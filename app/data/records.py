@@ -0,0 +1,129 @@
+"""
+Compact in-memory product records
+"""
+import json
+import sys
+import zlib
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List
+
+from app.core.models import Product
+
+# Keys of a product mapping, in Product model order
+FIELDS = tuple(Product.model_fields)
+
+# Bytes of sample text used as the shared compression dictionary
+_ZDICT_SIZE = 32 * 1024
+
+# Products buffered to train the dictionary before records are built
+_TRAINING_SAMPLE = 256
+
+
+class BlobCodec:
+    """
+    Raw-deflate codec with a dictionary shared by every record
+
+    Descriptions and specifications are short and repetitive across a
+    catalog, so compressing each one against a dictionary of sample text
+    shrinks them several times more than plain zlib. The primed
+    (de)compressor is copied per call instead of re-reading the dictionary.
+    """
+
+    def __init__(self, zdict: bytes):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, -15, 8, zdict=zdict) if zdict else None
+        self._decompressor = zlib.decompressobj(-15, zdict=zdict) if zdict else None
+        self._zdict = zdict
+
+    @classmethod
+    def train(cls, texts: Iterable[str]) -> "BlobCodec":
+        # zlib favours matches near the end of the dictionary
+        return cls("".join(texts).encode("utf-8")[-_ZDICT_SIZE:])
+
+    def encode(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        if self._compressor is None:
+            return zlib.compress(data)
+        compressor = self._compressor.copy()
+        return compressor.compress(data) + compressor.flush()
+
+    def decode(self, blob: bytes) -> str:
+        if self._decompressor is None:
+            return zlib.decompress(blob).decode("utf-8")
+        return self._decompressor.copy().decompress(blob).decode("utf-8")
+
+
+def _dump_specification(specification: Dict[str, Any]) -> str:
+    return json.dumps(specification, ensure_ascii=False, separators=(",", ":"))
+
+
+class ProductRecord(Mapping):
+    """
+    Read-only product with ``__slots__`` instead of a per-product dict
+
+    Category, subcategory, brand, usage and colors are interned so every
+    record shares one copy of each string, colors are a tuple, and the
+    specification and description are kept compressed and decoded on
+    access. Records behave as mappings with the ``Product`` fields, so
+    ``record["price"]`` and ``Product.model_validate(record)`` work as they
+    do for the plain dicts.
+    """
+
+    __slots__ = ("id", "name", "category", "subcategory", "brand", "price", "availability",
+                 "rating", "color", "usage", "_specification", "_description", "_codec")
+
+    def __init__(self, product: Dict[str, Any], codec: BlobCodec):
+        self.id = product["id"]
+        self.name = product["name"]
+        self.category = sys.intern(product["category"])
+        self.subcategory = sys.intern(product["subcategory"])
+        self.brand = sys.intern(product["brand"])
+        self.price = product["price"]
+        self.availability = product["availability"]
+        self.rating = product["rating"]
+        self.color = tuple(sys.intern(color) for color in product["color"])
+        self.usage = sys.intern(product["usage"])
+        self._specification = codec.encode(_dump_specification(product["specification"]))
+        self._description = codec.encode(product["description"])
+        self._codec = codec
+
+    @property
+    def specification(self) -> Dict[str, Any]:
+        return json.loads(self._codec.decode(self._specification))
+
+    @property
+    def description(self) -> str:
+        return self._codec.decode(self._description)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return f"ProductRecord(id={self.id!r}, name={self.name!r})"
+
+
+def compact(products: Iterable[Dict[str, Any]]) -> List[ProductRecord]:
+    """
+    Convert product dicts to records
+
+    ``products`` may be a stream (e.g. ``iter_catalog``); only the first
+    few hundred dicts, used to train the compression dictionary, are held
+    at once.
+    """
+    products = iter(products)
+    sample = [product for _, product in zip(range(_TRAINING_SAMPLE), products)]
+    codec = BlobCodec.train(
+        text
+        for product in sample
+        for text in (_dump_specification(product["specification"]), product["description"])
+    )
+    records = [ProductRecord(product, codec) for product in sample]
+    records.extend(ProductRecord(product, codec) for product in products)
+    return records
@@ -0,0 +1,130 @@
+"""
+Product storage behind the product routes
+
+``create_repository`` picks the backend from ``DB_URL``: the in-memory
+catalog (default) or a SQLite database (``sqlite:///path/to/catalog.db``).
+Both return pre-serialized product JSON, so routes assemble responses the
+same way whichever backend serves them.
+"""
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.models import ProductSearchParams
+
+# Cursor position: (sort key or None, product id) of the last product returned
+After = Optional[Tuple[Optional[float], int]]
+
+
+class StaleCursor(Exception):
+    """The product a cursor points at is no longer in the catalog"""
+
+
+class SearchPage(NamedTuple):
+    results: bytes  # JSON array of products
+    count: int  # products in ``results``
+    total: Optional[int]  # all matches, if requested
+    next_cursor: Optional[str]
+
+
+class ProductRepository(ABC):
+    """Operations the product routes need from a catalog backend"""
+
+    @abstractmethod
+    async def search(self, params: ProductSearchParams, sort: Optional[str], after: After,
+                     offset: int, limit: int, include_total: bool) -> SearchPage:
+        """
+        One page of matches for ``params`` in ``sort`` order (catalog order if
+        None), starting after the cursor position ``after`` and skipping
+        ``offset`` more. Raises StaleCursor if ``after`` names an unknown product.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def export(self, params: ProductSearchParams, sort: Optional[str]) -> AsyncIterator[List[bytes]]:
+        """
+        Every match for ``params`` in ``sort`` order (catalog order if None),
+        as lists of up to ``EXPORT_BATCH_SIZE`` product JSON payloads. Each
+        batch is read only when the consumer asks for it.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, product_id: int) -> Optional[Tuple[bytes, str]]:
+        """``(product JSON, category)`` for ``product_id``, or None if unknown"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def lookup(self, product_ids: List[int]) -> Dict[int, Tuple[bytes, str]]:
+        """``(product JSON, category)`` for each known ID in ``product_ids``"""
+        raise NotImplementedError
+
+    async def get_many(self, product_ids: List[int]) -> Tuple[bytes, List[int]]:
+        """JSON array of the known products in request order, and the unknown IDs"""
+        products = await self.lookup(product_ids)
+        found = [products[product_id][0] for product_id in product_ids if product_id in products]
+        missing = [product_id for product_id in product_ids if product_id not in products]
+        return b"[" + b",".join(found) + b"]", missing
+
+    @abstractmethod
+    async def facets(self, params: ProductSearchParams) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """Number of matches and facet counts (see ``FacetIndex``) for ``params``"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def category_label(self, category: str) -> Optional[str]:
+        """Canonical spelling of a user-supplied category, or None if unknown"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def categories(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def subcategories(self, category: Optional[str] = None) -> List[str]:
+        """All subcategories, or those of ``category`` (case-insensitive)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def brands(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def colors(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def suggest(self, prefix: str, limit: int) -> bytes:
+        """JSON array of up to ``limit`` search-box completions for ``prefix``, best first"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release connections and threads at shutdown"""
+
+
+def create_repository() -> ProductRepository:
+    """
+    Backend for ``DB_URL``; backends are imported lazily so only one is loaded
+
+    With ``CACHE_URL`` set, or in front of a database, responses are cached
+    in process and in the shared cache (see ``CachedRepository``).
+    """
+    if settings.DB_URL:
+        if not settings.DB_URL.startswith("sqlite:///"):
+            raise ValueError(f"Unsupported DB_URL (expected sqlite:///path): {settings.DB_URL}")
+        from app.data.sqlite import SQLiteRepository
+        repository = SQLiteRepository(settings.DB_URL[len("sqlite:///"):])
+    else:
+        from app.data.memory import InMemoryRepository
+        repository = InMemoryRepository()
+
+    if settings.CACHE_URL or settings.DB_URL:
+        from app.core.tiered_cache import create_shared_cache
+        from app.data.cached import CachedRepository
+        shared = create_shared_cache(settings.CACHE_URL) if settings.CACHE_URL else None
+        repository = CachedRepository(repository, shared)
+        if not settings.DB_URL:
+            # Cached responses of the in-memory catalog are stale once it is reloaded
+            from app.data.catalog import catalog
+            catalog.on_change(repository.clear)
+    return repository
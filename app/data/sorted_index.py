@@ -0,0 +1,137 @@
+"""
+Sorted secondary indexes on price and rating for range filters and ordering
+"""
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.core.models import ProductSearchParams
+from app.data.bitmaps import Bitmap
+from app.data.columns import ProductColumns
+
+# Supported values of the ``sort`` search parameter: (column, descending)
+SORT_OPTIONS: Dict[str, Tuple[str, bool]] = {
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "rating_desc": ("rating", True),
+}
+
+# Positions tested per step when walking a sorted order for a page of results
+_SCAN_CHUNK = 1024
+
+
+class SortedView:
+    """Catalog positions ordered by one column, with the sorted keys for binary search"""
+
+    __slots__ = ("order", "keys")
+
+    def __init__(self, positions: np.ndarray, values: np.ndarray):
+        # Ties are broken by catalog position so the order is total and stable
+        idx = np.lexsort((positions, values))
+        self.order = positions[idx].astype(np.int32)
+        self.keys = values[idx]
+
+    def bounds(self, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        """Index range of the entries whose key lies in ``[low, high]``"""
+        start = 0 if low is None else int(np.searchsorted(self.keys, low, side="left"))
+        stop = len(self.keys) if high is None else int(np.searchsorted(self.keys, high, side="right"))
+        return start, stop
+
+    def range(self, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        """Positions whose key lies in ``[low, high]``, in ascending key order"""
+        start, stop = self.bounds(low, high)
+        return self.order[start:stop]
+
+    def locate(self, key: float, position: int, side: str) -> int:
+        """Index of the entry ``(key, position)`` in the order, via binary search on both"""
+        tie_start = int(np.searchsorted(self.keys, key, side="left"))
+        tie_stop = int(np.searchsorted(self.keys, key, side="right"))
+        return tie_start + int(np.searchsorted(self.order[tie_start:tie_stop], position, side=side))
+
+
+class SortedIndex:
+    """
+    Price and rating orders over the whole catalog plus per-category and
+    per-subcategory views.
+
+    Range filters are two binary searches instead of a full column scan,
+    and a sorted page lazily walks the narrowest matching view from its first
+    in-range entry (or from a cursor), so it stops as soon as the page is full.
+    """
+
+    def __init__(self, columns: ProductColumns):
+        self.size = columns.size
+        everything = np.arange(self.size)
+        self._columns = {"price": columns.price, "rating": columns.rating}
+        self._global = {name: SortedView(everything, values) for name, values in self._columns.items()}
+
+        self._views: Dict[Tuple[str, str, str], SortedView] = {}
+        for field, codes, vocabulary in (
+            ("category", columns.category, columns.category_codes),
+            ("subcategory", columns.subcategory, columns.subcategory_codes),
+        ):
+            for value, code in vocabulary.items():
+                positions = np.flatnonzero(codes == code)
+                for name, values in self._columns.items():
+                    self._views[(name, field, value)] = SortedView(positions, values[positions])
+
+    @staticmethod
+    def _bounds(column: str, params: ProductSearchParams) -> Tuple[Optional[float], Optional[float]]:
+        if column == "price":
+            return params.min_price, params.max_price
+        return params.min_rating, None
+
+    def range_filter(self, params: ProductSearchParams) -> Optional[Bitmap]:
+        """Bitmap for the price and rating range filters, or None if unused"""
+        result = None
+        for column in self._columns:
+            low, high = self._bounds(column, params)
+            if low is None and high is None:
+                continue
+            bitmap = Bitmap.from_positions(self._global[column].range(low, high), self.size)
+            result = bitmap if result is None else result & bitmap
+        return result
+
+    def _view(self, column: str, params: ProductSearchParams) -> SortedView:
+        # The subcategory view is never larger than the category view
+        for field in ("subcategory", "category"):
+            value = getattr(params, field)
+            if value:
+                view = self._views.get((column, field, value.lower()))
+                if view is not None:
+                    return view
+        return self._global[column]
+
+    def ordered(self, sort: str, params: ProductSearchParams,
+                after: Optional[Tuple[float, int]] = None) -> np.ndarray:
+        """
+        Candidate positions in ``sort`` order, pre-narrowed by the view and range filters
+
+        ``after`` is the ``(sort key, position)`` of the last item already
+        returned; only entries strictly after it are included.
+        """
+        column, descending = SORT_OPTIONS[sort]
+        view = self._view(column, params)
+        start, stop = view.bounds(*self._bounds(column, params))
+        if after is not None:
+            key, position = after
+            if descending:
+                stop = min(stop, view.locate(key, position, side="left"))
+            else:
+                start = max(start, view.locate(key, position, side="right"))
+        order = view.order[start:max(start, stop)]
+        return order[::-1] if descending else order
+
+    def iter_matches(self, selection: Bitmap, sort: str, params: ProductSearchParams,
+                     after: Optional[Tuple[float, int]] = None) -> Iterator[np.ndarray]:
+        """Lazily yield chunks of ``selection`` positions in ``sort`` order"""
+        order = self.ordered(sort, params, after)
+        for start in range(0, len(order), _SCAN_CHUNK):
+            chunk = order[start:start + _SCAN_CHUNK]
+            hits = chunk[selection.contains(chunk)]
+            if len(hits):
+                yield hits
+
+    def key(self, sort: str, position: int) -> float:
+        """Value of the ``sort`` column for the product at ``position``"""
+        return float(self._columns[SORT_OPTIONS[sort][0]][position])
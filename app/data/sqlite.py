@@ -0,0 +1,613 @@
+"""
+Product repository backed by a SQLite database
+
+The database holds a narrow row of lowercased filter columns per product,
+with the validated product JSON and the searchable text in separate tables
+(so filter scans stay small), an FTS5 trigram index over name and
+description for substring filters, and an FTS5 word index over name, brand
+and description for relevance ranking. A catalog larger than memory is
+served from disk with only SQLite's page cache resident. Build one from an
+NDJSON catalog with:
+
+    python -m app.data.sqlite --catalog catalog.ndjson.gz --output catalog.db
+
+and serve it with ``DB_URL=sqlite:///catalog.db``. When the file does not
+exist yet it is built at startup from ``CATALOG_PATH`` or the bundled sample.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import DB_QUERY_LATENCY
+from app.core.models import Product, ProductSearchParams
+from app.core.singleflight import SingleFlight
+from app.data.facets import PRICE_BUCKET_EDGES, PRICE_BUCKET_LABELS
+from app.data.pagination import encode_cursor
+from app.data.payloads import dumps
+from app.data.ranking import FIELD_WEIGHTS, tokenize
+from app.data.repository import After, ProductRepository, SearchPage, StaleCursor
+from app.data.suggest import SuggestIndex, SuggestionBuilder
+
+# fcntl is POSIX-only; without it concurrent startup builds still never expose a partial file
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger("api")
+
+# Products inserted per executemany batch while building
+_BUILD_BATCH = 10000
+
+# Largest IN (...) list per batch lookup
+_MAX_VARIABLES = 900
+
+SCHEMA = """
+CREATE TABLE products (
+    position INTEGER PRIMARY KEY,  -- catalog order
+    id INTEGER NOT NULL UNIQUE,
+    category TEXT NOT NULL,  -- lowercased, as are subcategory and brand
+    subcategory TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    price REAL NOT NULL,
+    rating REAL NOT NULL,
+    availability INTEGER NOT NULL
+);
+CREATE TABLE payloads (
+    position INTEGER PRIMARY KEY,
+    payload BLOB NOT NULL  -- validated Product JSON
+);
+CREATE TABLE product_text (
+    position INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE colors (
+    code INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE  -- lowercased
+);
+CREATE TABLE product_colors (
+    color INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (color, position)
+) WITHOUT ROWID;
+CREATE TABLE suggestions (
+    text TEXT NOT NULL,  -- see app.data.suggest
+    type TEXT NOT NULL,
+    id INTEGER,
+    weight REAL NOT NULL
+);
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL  -- JSON
+);
+CREATE VIRTUAL TABLE products_fts USING fts5(
+    name, description, content='product_text', content_rowid='position', tokenize='trigram'
+);
+CREATE VIRTUAL TABLE product_words USING fts5(
+    name, brand, description, content='', prefix='2 3'  -- rowid is the position
+);
+"""
+
+# Created after the bulk insert; every one ends in position so equal keys
+# come out in catalog order, matching the keyset cursor (key, position)
+INDEXES = """
+CREATE INDEX products_price ON products (price, position);
+CREATE INDEX products_rating ON products (rating, position);
+CREATE INDEX products_category_price ON products (category, price, position);
+CREATE INDEX products_category_rating ON products (category, rating, position);
+CREATE INDEX products_subcategory_price ON products (subcategory, price, position);
+CREATE INDEX products_subcategory_rating ON products (subcategory, rating, position);
+CREATE INDEX products_brand_price ON products (brand, price, position);
+CREATE INDEX products_availability_price ON products (availability, price, position);
+CREATE INDEX product_colors_position ON product_colors (position, color);
+"""
+
+# sort option -> (column, descending)
+SORT_COLUMNS = {
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "rating_desc": ("rating", True),
+}
+
+
+@contextmanager
+def _build_lock(path: str):
+    """Exclusive lock on ``path.lock``, so one process at a time builds ``path``"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def build_database(path: str, products: Iterable[Mapping[str, Any]]) -> int:
+    """
+    Write ``products`` to a new database at ``path``; returns the product count
+
+    The database is built in a temporary file next to ``path`` and moved into
+    place when complete, so readers never open a half-built catalog.
+    """
+    building = f"{path}.{os.getpid()}.building"
+    if os.path.exists(building):
+        os.remove(building)
+    try:
+        count = _write_database(building, products)
+        os.replace(building, path)
+    except BaseException:
+        if os.path.exists(building):
+            os.remove(building)
+        raise
+    return count
+
+
+def _write_database(path: str, products: Iterable[Mapping[str, Any]]) -> int:
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.executescript(SCHEMA)
+
+        color_codes: Dict[str, int] = {}
+        # First-seen spelling per lowercased value, and every distinct spelling
+        labels: Dict[str, Dict[str, str]] = {"category": {}, "subcategory": {}, "brand": {}, "color": {}}
+        spellings: Dict[str, set] = {field: set() for field in labels}
+        by_category: Dict[str, set] = {}
+        suggestions = SuggestionBuilder()
+        rows, payload_rows, text_rows, word_rows, color_rows, count = [], [], [], [], [], 0
+
+        def flush():
+            connection.executemany("INSERT INTO products VALUES (?,?,?,?,?,?,?,?)", rows)
+            connection.executemany("INSERT INTO payloads VALUES (?,?)", payload_rows)
+            connection.executemany("INSERT INTO product_text VALUES (?,?,?)", text_rows)
+            connection.executemany(
+                "INSERT INTO product_words(rowid, name, brand, description) VALUES (?,?,?,?)", word_rows
+            )
+            connection.executemany("INSERT OR IGNORE INTO product_colors VALUES (?,?)", color_rows)
+            for batch in (rows, payload_rows, text_rows, word_rows, color_rows):
+                batch.clear()
+
+        for position, product in enumerate(products):
+            rows.append((
+                position, product["id"],
+                product["category"].lower(), product["subcategory"].lower(), product["brand"].lower(),
+                product["price"], product["rating"], int(product["availability"]),
+            ))
+            payload_rows.append((position, dumps(Product.model_validate(product).model_dump())))
+            text_rows.append((position, product["name"], product["description"]))
+            word_rows.append((position, product["name"], product["brand"], product["description"]))
+            for field in ("category", "subcategory", "brand"):
+                labels[field].setdefault(product[field].lower(), product[field])
+                spellings[field].add(product[field])
+            by_category.setdefault(product["category"].lower(), set()).add(product["subcategory"])
+            for color in product["color"]:
+                code = color_codes.setdefault(color.lower(), len(color_codes))
+                labels["color"].setdefault(color.lower(), color)
+                spellings["color"].add(color)
+                color_rows.append((code, position))
+            suggestions.add(product)
+            count += 1
+            if len(rows) >= _BUILD_BATCH:
+                flush()
+        flush()
+
+        connection.executemany("INSERT INTO colors VALUES (?,?)", [(code, name) for name, code in color_codes.items()])
+        connection.executemany("INSERT INTO suggestions VALUES (?,?,?,?)", suggestions.entries())
+        connection.executescript(INDEXES)
+        connection.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+        # Option endpoints list every distinct spelling, as the in-memory catalog does
+        meta = {
+            "labels": labels,
+            "categories": sorted(spellings["category"]),
+            "subcategories": sorted(spellings["subcategory"]),
+            "brands": sorted(spellings["brand"]),
+            "colors": sorted(spellings["color"]),
+            "subcategories_by_category": {k: sorted(v) for k, v in by_category.items()},
+        }
+        connection.executemany("INSERT INTO meta VALUES (?,?)", [(k, json.dumps(v)) for k, v in meta.items()])
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+    return count
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of read-only SQLite connections
+
+    Connections are opened on first use (retrying ``connect_retry`` times)
+    and handed out one per query; callers wait when all are busy.
+    """
+
+    def __init__(self, path: str, size: int, connect_retry: int = 3, timeout: float = 30.0):
+        self.path = path
+        self.size = size
+        self.connect_retry = connect_retry
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        delay = 0.1
+        for attempt in range(self.connect_retry + 1):
+            try:
+                connection = sqlite3.connect(
+                    f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+                )
+                connection.execute("PRAGMA query_only=ON")
+                connection.execute("PRAGMA mmap_size=268435456")
+                connection.execute("PRAGMA cache_size=-32768")
+                return connection
+            except sqlite3.OperationalError:
+                if attempt == self.connect_retry:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    @contextmanager
+    def connection(self):
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    connection = self._open()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                connection = self._idle.get(timeout=self.timeout)
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _storable(product_id: int) -> bool:
+    """Whether ``product_id`` fits a SQLite INTEGER; larger IDs cannot be in the catalog"""
+    return -2**63 <= product_id < 2**63
+
+
+def _fts_phrase(query: str) -> str:
+    """FTS5 phrase for a substring search; trigram phrases match substrings"""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _word_query(query: str) -> str:
+    """FTS5 query matching any word of ``query``, the last one also as a prefix"""
+    words = [f'"{word}"' for word in tokenize(query)]
+    if words:
+        words[-1] += "*"
+    return " OR ".join(words)
+
+
+def _where(params: ProductSearchParams) -> Tuple[str, List[Any]]:
+    """SQL condition and arguments for the filters in ``params``"""
+    clauses, args = [], []
+    for field in ("category", "subcategory", "brand"):
+        value = getattr(params, field)
+        if value:
+            clauses.append(f"{field} = ?")
+            args.append(value.lower())
+    if params.min_price is not None:
+        clauses.append("price >= ?")
+        args.append(params.min_price)
+    if params.max_price is not None:
+        clauses.append("price <= ?")
+        args.append(params.max_price)
+    if params.min_rating is not None:
+        clauses.append("rating >= ?")
+        args.append(params.min_rating)
+    if params.availability is not None:
+        clauses.append("availability = ?")
+        args.append(int(params.availability))
+    if params.color:
+        clauses.append(
+            "position IN (SELECT position FROM product_colors WHERE color IN "
+            "(SELECT code FROM colors WHERE instr(name, ?) > 0))"
+        )
+        args.append(params.color.lower())
+    if params.query:
+        query = params.query.lower()
+        if len(query) >= 3:
+            clauses.append("position IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+            args.append(_fts_phrase(query))
+        else:
+            # Too short for trigrams; scan
+            clauses.append(
+                "position IN (SELECT position FROM product_text "
+                "WHERE instr(lower(name), ?) > 0 OR instr(lower(description), ?) > 0)"
+            )
+            args.extend([query, query])
+    return (" AND ".join(clauses) or "1"), args
+
+
+def _payloads(connection: sqlite3.Connection, positions: List[int]) -> List[bytes]:
+    """Product JSON for ``positions``, in the same order"""
+    payloads = {}
+    for start in range(0, len(positions), _MAX_VARIABLES):
+        chunk = positions[start:start + _MAX_VARIABLES]
+        payloads.update(connection.execute(
+            f"SELECT position, payload FROM payloads WHERE position IN ({','.join('?' * len(chunk))})", chunk
+        ))
+    return [payloads[position] for position in positions]
+
+
+def _named_counts(rows: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+    """Non-zero counts keyed by label, largest first (as FacetIndex orders them)"""
+    return dict(sorted(((label, count) for label, count in rows if count), key=lambda item: (-item[1], item[0])))
+
+
+class SQLiteRepository(ProductRepository):
+    """
+    Serves products from a SQLite database
+
+    Queries run on a dedicated thread pool with one thread per pooled
+    connection (``DB_MAX_CONNECTIONS``), so the event loop never blocks on
+    disk. Paging is keyset-based on (sort key, position), matching the
+    in-memory backend's order and cursors. Relevance is FTS5's ``bm25()``
+    with the ``FIELD_WEIGHTS`` column weights, so scores differ from the
+    in-memory BM25F but ties and paging behave the same.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            # Worker processes start together; the first builds, the rest wait and reuse it
+            with _build_lock(path):
+                if not os.path.exists(path):
+                    from app.data.generator import configured_products
+                    logger.info(f"🗄️ Building SQLite catalog at {path}")
+                    build_database(path, configured_products())
+        self.pool = ConnectionPool(path, settings.DB_MAX_CONNECTIONS, settings.DB_CONNECT_RETRY)
+        self._executor = ThreadPoolExecutor(settings.DB_MAX_CONNECTIONS, thread_name_prefix="sqlite")
+        self._flight = SingleFlight("db_search")
+        with self.pool.connection() as connection:
+            self._meta = {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM meta")}
+            if "labels" not in self._meta:
+                raise RuntimeError(f"{path} is an incomplete catalog; remove it and restart to rebuild")
+            self.size = connection.execute("SELECT count(*) FROM products").fetchone()[0]
+            tables = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            # Autocomplete is answered in memory; only the suggestion list is kept, not the catalog
+            self.suggestions = SuggestIndex(
+                connection.execute("SELECT text, type, id, weight FROM suggestions")
+                if "suggestions" in tables else []
+            )
+        self._ranked = "product_words" in tables
+        if not {"product_words", "suggestions"} <= tables:
+            logger.warning(f"⚠️ {path} predates relevance ranking and suggestions; rebuild it to enable them")
+        logger.info(f"🗄️ Serving {self.size} products from SQLite at {path}")
+
+    async def _run(self, operation: str, fn, *args):
+        """Run ``fn(connection, *args)`` on the query thread pool"""
+        def call():
+            start_time = time.perf_counter()
+            with self.pool.connection() as connection:
+                result = fn(connection, *args)
+            DB_QUERY_LATENCY.labels(operation=operation).observe(time.perf_counter() - start_time)
+            return result
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def search(self, params: ProductSearchParams, sort: Optional[str], after: After,
+                     offset: int, limit: int, include_total: bool) -> SearchPage:
+        key = (params.cache_key(), sort, after, offset, limit, include_total)
+        return await self._flight.do(
+            key, lambda: self._run("search", self._search, params, sort, after, offset, limit, include_total)
+        )
+
+    def _search(self, connection, params, sort, after, offset, limit, include_total) -> SearchPage:
+        where, args = _where(params)
+        cursor = None
+        if after is not None:
+            cursor_key, cursor_id = after
+            row = connection.execute("SELECT position FROM products WHERE id = ?", (cursor_id,)).fetchone()
+            if row is None:
+                raise StaleCursor(cursor_id)
+            cursor = (cursor_key, row[0])
+
+        rows = self._page(connection, params, where, args, sort, cursor, offset, limit + 1)
+        page = rows[:limit]
+
+        next_cursor = None
+        if len(rows) > limit:
+            _, product_id, key = page[-1]
+            next_cursor = encode_cursor(sort, key, product_id)
+
+        total = None
+        if include_total:
+            total = connection.execute(f"SELECT count(*) FROM products WHERE {where}", args).fetchone()[0]
+
+        # Payloads are fetched only for the page, after the filter columns are ordered
+        results = b"[" + b",".join(_payloads(connection, [row[0] for row in page])) + b"]"
+        return SearchPage(results, len(page), total, next_cursor)
+
+    def _page(self, connection, params: ProductSearchParams, where: str, args: List[Any], sort: Optional[str],
+              cursor: Optional[Tuple[Any, int]], offset: int, limit: int) -> List[Tuple[int, int, Any]]:
+        """``(position, id, sort key)`` of up to ``limit`` matches after the ``(sort key, position)`` cursor"""
+        # Page query pieces: optional CTE, row source, sort key, order and cursor condition
+        prefix, prefix_args, source = "", [], "products"
+        page_where, page_args = where, list(args)
+        if sort == "relevance":
+            key = "0.0"
+            words = _word_query(params.query or "")
+            if words and self._ranked:
+                weights = ", ".join(str(weight) for _, weight in FIELD_WEIGHTS)
+                prefix = (
+                    "WITH scored(doc, score) AS MATERIALIZED (SELECT rowid, -bm25(product_words, "
+                    f"{weights}) FROM product_words WHERE product_words MATCH ?) "
+                )
+                prefix_args = [words]
+                source = "products LEFT JOIN scored ON doc = position"
+                key = "coalesce(score, 0.0)"
+            # Best first, ties in catalog order
+            order = f"{key} DESC, position"
+            if cursor is not None:
+                page_where += f" AND ({key} < ? OR ({key} = ? AND position > ?))"
+                page_args.extend([cursor[0], cursor[0], cursor[1]])
+        elif sort:
+            key, descending = SORT_COLUMNS[sort]
+            direction = "DESC" if descending else "ASC"
+            order = f"{key} {direction}, position {direction}"
+            if cursor is not None:
+                page_where += f" AND ({key}, position) {'<' if descending else '>'} (?, ?)"
+                page_args.extend(cursor)
+        else:
+            key, order = "NULL", "position"
+            if cursor is not None:
+                page_where += " AND position > ?"
+                page_args.append(cursor[1])
+
+        return connection.execute(
+            f"{prefix}SELECT position, id, {key} FROM {source} WHERE {page_where} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?",
+            prefix_args + page_args + [limit, offset],
+        ).fetchall()
+
+    async def export(self, params: ProductSearchParams, sort: Optional[str]) -> AsyncIterator[List[bytes]]:
+        where, args = _where(params)
+        size = settings.EXPORT_BATCH_SIZE
+
+        def fetch(connection, cursor):
+            rows = self._page(connection, params, where, args, sort, cursor, 0, size)
+            return rows, _payloads(connection, [row[0] for row in rows])
+
+        # One keyset query per batch, so no connection is held while the client reads
+        cursor = None
+        while True:
+            rows, payloads = await self._run("export", fetch, cursor)
+            if payloads:
+                yield payloads
+            if len(rows) < size:
+                return
+            position, _, key = rows[-1]
+            cursor = (key, position)
+
+    async def get(self, product_id: int) -> Optional[Tuple[bytes, str]]:
+        if not _storable(product_id):
+            return None
+        row = await self._run("get", lambda connection: connection.execute(
+            "SELECT d.payload, p.category FROM products p JOIN payloads d ON d.position = p.position "
+            "WHERE p.id = ?", (product_id,)
+        ).fetchone())
+        if row is None:
+            return None
+        return row[0], self._meta["labels"]["category"][row[1]]
+
+    async def lookup(self, product_ids: List[int]) -> Dict[int, Tuple[bytes, str]]:
+        def fetch(connection):
+            rows = []
+            unique = [product_id for product_id in dict.fromkeys(product_ids) if _storable(product_id)]
+            for start in range(0, len(unique), _MAX_VARIABLES):
+                chunk = unique[start:start + _MAX_VARIABLES]
+                rows.extend(connection.execute(
+                    "SELECT p.id, d.payload, p.category FROM products p JOIN payloads d ON d.position = p.position "
+                    f"WHERE p.id IN ({','.join('?' * len(chunk))})", chunk
+                ))
+            return rows
+
+        labels = self._meta["labels"]["category"]
+        rows = await self._run("get_many", fetch)
+        return {product_id: (payload, labels[category]) for product_id, payload, category in rows}
+
+    async def facets(self, params: ProductSearchParams) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        return await self._run("facets", self._facets, params)
+
+    def _facets(self, connection, params: ProductSearchParams) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        where, args = _where(params)
+        labels = self._meta["labels"]
+
+        def grouped(expression: str):
+            return connection.execute(
+                f"SELECT {expression}, count(*) FROM products WHERE {where} GROUP BY 1", args
+            ).fetchall()
+
+        # Bucket i holds prices with exactly i edges at or below them
+        bucket = "CASE " + " ".join(
+            f"WHEN price < {edge} THEN {i}" for i, edge in enumerate(PRICE_BUCKET_EDGES)
+        ) + f" ELSE {len(PRICE_BUCKET_EDGES)} END"
+
+        colors = connection.execute(
+            "SELECT c.name, count(*) FROM product_colors pc JOIN colors c ON c.code = pc.color "
+            f"WHERE pc.position IN (SELECT position FROM products WHERE {where}) GROUP BY c.name",
+            args,
+        ).fetchall()
+        availability = grouped("availability")
+        counts = {
+            "category": _named_counts((labels["category"][v], n) for v, n in grouped("category")),
+            "subcategory": _named_counts((labels["subcategory"][v], n) for v, n in grouped("subcategory")),
+            "brand": _named_counts((labels["brand"][v], n) for v, n in grouped("brand")),
+            "color": _named_counts((labels["color"][v], n) for v, n in colors),
+            "availability": _named_counts((["false", "true"][v], n) for v, n in availability),
+            "price": _named_counts((PRICE_BUCKET_LABELS[v], n) for v, n in grouped(bucket)),
+        }
+        return sum(n for _, n in availability), counts
+
+    def category_label(self, category: str) -> Optional[str]:
+        return self._meta["labels"]["category"].get(category.lower())
+
+    def categories(self) -> List[str]:
+        return self._meta["categories"]
+
+    def subcategories(self, category: Optional[str] = None) -> List[str]:
+        if category:
+            return self._meta["subcategories_by_category"].get(category.lower(), [])
+        return self._meta["subcategories"]
+
+    def brands(self) -> List[str]:
+        return self._meta["brands"]
+
+    def colors(self) -> List[str]:
+        return self._meta["colors"]
+
+    def suggest(self, prefix: str, limit: int) -> bytes:
+        return self.suggestions.suggest(prefix, limit)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+
+def main():
+    from app.data.generator import read_catalog
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", required=True, help="NDJSON catalog (app.data.generator)")
+    parser.add_argument("--output", default="catalog.db")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_database(args.output, read_catalog(args.catalog))
+    print(f"Wrote {count} products to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Prefix index for search-box autocomplete
+"""
+import bisect
+import itertools
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.data.payloads import dumps
+from app.data.ranking import tokenize
+
+# Most suggestions a single request may ask for
+MAX_SUGGESTIONS = 20
+
+# Prefixes up to this many characters have their top suggestions precomputed
+_PRECOMPUTED_LENGTH = 2
+
+# Description words are suggested if at least this long, in at least this
+# many products, and in no more than this share of them (drops "with" etc.)
+_MIN_TERM_LENGTH = 4
+_MIN_TERM_PRODUCTS = 3
+_MAX_TERM_SHARE = 0.2
+
+# Suggestion types, preferred in this order when two have the same text
+KINDS = ("category", "subcategory", "brand", "product", "term")
+
+# JSON between a suggestion's text and its id, per type
+_KIND_FIELDS = [b',"type":' + dumps(kind) + b',"id":' for kind in KINDS]
+
+# (text, type, product id or None, weight)
+Entry = Tuple[str, str, Optional[int], float]
+
+# A word starts after a non-word character other than an apostrophe ("levi's" has one word)
+_WORD_START = re.compile(r"(?<![\w'’])\w")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class SuggestionBuilder:
+    """
+    Collects suggestions from a stream of products
+
+    Every product name is a suggestion weighted by its rating; categories,
+    subcategories, brands and frequent description words are weighted by
+    the summed rating of the products they cover.
+    """
+
+    def __init__(self):
+        self._products: List[Entry] = []
+        self._groups: Dict[Tuple[str, str], List[Any]] = {}  # (type, lowercase) -> [label, weight]
+        self._terms: Dict[str, List[float]] = {}  # word -> [weight, products]
+        self._count = 0
+
+    def add(self, product: Mapping[str, Any]) -> None:
+        self._count += 1
+        rating = float(product["rating"])
+        self._products.append((product["name"], "product", product["id"], rating))
+        for kind in ("category", "subcategory", "brand"):
+            group = self._groups.setdefault((kind, product[kind].lower()), [product[kind], 0.0])
+            group[1] += rating
+        for word in set(tokenize(product["description"])):
+            if len(word) >= _MIN_TERM_LENGTH and not word.isdigit():
+                term = self._terms.setdefault(word, [0.0, 0])
+                term[0] += rating
+                term[1] += 1
+
+    def entries(self) -> List[Entry]:
+        entries = list(self._products)
+        entries.extend((label, kind, None, weight) for (kind, _), (label, weight) in self._groups.items())
+        entries.extend(
+            (word, "term", None, weight) for word, (weight, products) in self._terms.items()
+            if _MIN_TERM_PRODUCTS <= products <= _MAX_TERM_SHARE * self._count
+        )
+        return entries
+
+
+def suggestion_entries(products: Iterable[Mapping[str, Any]]) -> List[Entry]:
+    builder = SuggestionBuilder()
+    for product in products:
+        builder.add(product)
+    return builder.entries()
+
+
+class _Keys:
+    """Sorted keys of a ``SuggestIndex`` as a sequence of bytes for ``bisect``, cut to ``width`` bytes"""
+
+    def __init__(self, index: "SuggestIndex", width: int):
+        self._index = index
+        self._width = width
+
+    def __len__(self) -> int:
+        return len(self._index._offsets)
+
+    def __getitem__(self, i: int) -> bytes:
+        index = self._index
+        start = index._offsets[i]
+        return index._keys[start:min(start + self._width, index._key_bounds[index._ranks[i] + 1])]
+
+
+class SuggestIndex:
+    """
+    Sorted array of lowercase keys searched with binary search
+
+    Each suggestion is keyed under every word start of its text, so "1000"
+    and "noise" complete names as well as "sony" does. Suggestions are
+    ranked once by weight (ties alphabetically), which makes the best
+    completions of a prefix the smallest ranks in its key range: one- and
+    two-character prefixes, whose ranges are widest, have their top
+    ``MAX_SUGGESTIONS`` precomputed, and longer ones take a partial
+    selection over the range.
+
+    The lowercase texts are one UTF-8 buffer in rank order and a key is an
+    offset into it (UTF-8 byte order is code point order), so no per-key
+    strings are kept. Display texts share a second buffer as JSON strings,
+    and the few suggestions a request returns are assembled from it.
+    """
+
+    def __init__(self, entries: Iterable[Entry]):
+        # One suggestion per distinct text: the preferred type, then the heaviest
+        best: Dict[str, Entry] = {}
+        for entry in entries:
+            text, kind, _, weight = entry
+            key = _normalize(text)
+            current = best.get(key)
+            if current is None or (KINDS.index(kind), -weight) < (KINDS.index(current[1]), -current[3]):
+                best[key] = entry
+        ranked = sorted(best.items(), key=lambda item: (-item[1][3], item[0]))
+        del best
+
+        # Per rank: lowercase key and JSON display text in shared buffers, type and product id
+        keys = [key.encode("utf-8") for key, _ in ranked]
+        texts = [dumps(text) for _, (text, _, _, _) in ranked]
+        self._keys = b"".join(keys)
+        self._key_bounds = array("q", itertools.accumulate((len(key) for key in keys), initial=0))
+        self._texts = b"".join(texts)
+        self._text_bounds = array("q", itertools.accumulate((len(text) for text in texts), initial=0))
+        self._kinds = array("B", (KINDS.index(kind) for _, (_, kind, _, _) in ranked))
+        self._ids = array("q", (-1 if product_id is None else product_id for _, (_, _, product_id, _) in ranked))
+        self._has_id = array("B", (product_id is not None for _, (_, _, product_id, _) in ranked))
+        del keys, texts
+
+        # (suffix, rank, byte offset of the suffix) for every word start, sorted by suffix
+        suffixes: List[Tuple[str, int, int]] = []
+        for rank, (key, _) in enumerate(ranked):
+            base = self._key_bounds[rank]
+            for match in _WORD_START.finditer(key):
+                suffixes.append((key[match.start():], rank, base + len(key[:match.start()].encode("utf-8"))))
+        suffixes.sort()
+        self._offsets = array("q", (offset for _, _, offset in suffixes))
+        self._ranks = array("i", (rank for _, rank, _ in suffixes))
+
+        # Precomputed ranks back to back, and each short prefix's (start, stop) in them
+        prefixes = sorted({key[:length] for key, _, _ in suffixes for length in range(1, _PRECOMPUTED_LENGTH + 1)})
+        del suffixes, ranked
+        self._top = array("i")
+        self._top_ranges: Dict[str, Tuple[int, int]] = {}
+        for prefix in prefixes:
+            start = len(self._top)
+            self._top.extend(self._select(prefix, MAX_SUGGESTIONS))
+            self._top_ranges[prefix] = (start, len(self._top))
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the buffers and arrays"""
+        arrays = (self._key_bounds, self._text_bounds, self._kinds, self._ids, self._has_id, self._offsets, self._ranks, self._top)
+        return len(self._keys) + len(self._texts) + sum(len(a) * a.itemsize for a in arrays)
+
+    def _select(self, prefix: str, limit: int) -> List[int]:
+        """Ranks of the best ``limit`` suggestions with a word starting with ``prefix``"""
+        encoded = prefix.encode("utf-8")
+        keys = _Keys(self, len(encoded))
+        start = bisect.bisect_left(keys, encoded)
+        stop = bisect.bisect_right(keys, encoded, start)
+        ranks = np.frombuffer(self._ranks, dtype=np.int32)[start:stop]
+        # A suggestion keyed by several matching words appears more than once
+        sample = 4 * limit
+        if len(ranks) > sample:
+            candidates = np.unique(np.partition(ranks, sample - 1)[:sample])
+            if len(candidates) >= limit:
+                return candidates[:limit].tolist()
+        return np.unique(ranks)[:limit].tolist()
+
+    def suggest(self, prefix: str, limit: int) -> bytes:
+        """JSON array of up to ``limit`` completions of ``prefix``, best first"""
+        prefix = _normalize(prefix)
+        if not prefix:
+            return b"[]"
+        if len(prefix) <= _PRECOMPUTED_LENGTH:
+            start, stop = self._top_ranges.get(prefix, (0, 0))
+            ranks = self._top[start:min(stop, start + limit)]
+        else:
+            ranks = self._select(prefix, limit)
+        texts, bounds, kinds, ids, has_id = self._texts, self._text_bounds, self._kinds, self._ids, self._has_id
+        return b"[" + b",".join(
+            b'{"text":' + texts[bounds[rank]:bounds[rank + 1]] + _KIND_FIELDS[kinds[rank]]
+            + (b"%d}" % ids[rank] if has_id[rank] else b"null}")
+            for rank in ranks
+        ) + b"]"
@@ -1,11 +1,12 @@
-import uvicorn
+import os
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+from prometheus_client import multiprocess
 
 from app.core.logging import setup_logging
 from app.core.middleware import setup_middleware
 from app.routes.base import router as base_router
-from app.routes.products import router as items_router
+from app.routes.products import repository, router as items_router
 from app.routes.monitoring import router as monitoring_router
 from app.core.tracing import setup_tracing
 
@@ -18,6 +19,10 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Application startup complete")
     yield
     logger.info("🛑 Application shutdown initiated")
+    await repository.close()
+    # Drop this worker's live gauges from the multi-process aggregate
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
 
 """Create and configure the FastAPI application"""
 app = FastAPI(
@@ -38,5 +43,7 @@ app.include_router(monitoring_router, tags=["Monitoring"])
     
 
 if __name__ == "__main__":
+    from app.server import run
+
     logger.info("🔥 Launching FastAPI app...")
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    run()
\ No newline at end of file
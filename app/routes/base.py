@@ -17,12 +17,14 @@ HEALTH_CHECK_COUNTER = Counter(
 
 HEALTH_CHECK_LATENCY = Gauge(
     "api_health_check_latency_ms", 
-    "Current health check latency in milliseconds"
+    "Current health check latency in milliseconds",
+    multiprocess_mode="mostrecent"
 )
 
 SYSTEM_HEALTH_SCORE = Gauge(
     "api_system_health_score",
-    "Current system health score (0-100)"
+    "Current system health score (0-100)",
+    multiprocess_mode="mostrecent"
 )
 
 
@@ -1,35 +1,62 @@
 import os
-import sys
 import random
 import logging
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import PlainTextResponse
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.logging import LokiShipper
+from app.core.exposition import ExpositionCache
+from app.core.metrics import exposition_registry, LATENCY_TRACKER
+
 router = APIRouter()
 logger = logging.getLogger("api")
 
-# Check if Loki is available
-loki_available = False
-try:
-    loki_available = True
-except ImportError:
-    pass
+# Aggregates all workers when launched with several processes
+registry = exposition_registry()
+exposition = ExpositionCache(registry, ttl_seconds=settings.METRICS_CACHE_TTL_SECONDS)
 
 @router.get("/metrics", response_class=PlainTextResponse)
-async def metrics():
-    """Prometheus metrics endpoint"""
-    return PlainTextResponse(generate_latest().decode(), media_type=CONTENT_TYPE_LATEST)
+async def metrics(request: Request):
+    """
+    Prometheus metrics endpoint
+
+    Serves OpenMetrics (with exemplars) when the scraper asks for it, gzips
+    when accepted, and reuses the rendered body for METRICS_CACHE_TTL_SECONDS.
+    """
+    body, content_type, gzipped = await exposition.render(
+        request.headers.get("accept"), request.headers.get("accept-encoding")
+    )
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=content_type, headers=headers)
+
+@router.get("/stats/latency")
+def latency_stats():
+    """
+    Tail latency percentiles (ms) over the recent window
+
+    Computed from in-process DDSketches per route and search complexity, with
+    a relative error of LATENCY_RELATIVE_ACCURACY at every percentile. With
+    several workers this reports the worker serving the request.
+    """
+    return {
+        "window_seconds": LATENCY_TRACKER.window_seconds,
+        "relative_accuracy": LATENCY_TRACKER.relative_accuracy,
+        **LATENCY_TRACKER.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }
 
 @router.get("/loki-status")
 def loki_status():
     """Check if Loki logging is operational"""
-    # Get the real URL that was used for Loki configuration
-    loki_url = "http://host.docker.internal:3100/loki/api/v1/push" if sys.platform in ["darwin", "win32"] else "http://localhost:3100/loki/api/v1/push"
+    shippers = [h for h in logger.handlers if isinstance(h, LokiShipper)]
     return {
-        "loki_enabled": loki_available,
-        "loki_url": loki_url if loki_available else None,
+        "loki_enabled": bool(shippers),
+        "loki_url": settings.LOKI_URL if shippers else None,
+        "queue_depth": sum(h.queue_depth for h in shippers),
         "timestamp": datetime.now().isoformat()
     }
 
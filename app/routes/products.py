@@ -1,27 +1,47 @@
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Literal, Optional, Dict, Any
 from fastapi import APIRouter, Query, HTTPException, Depends, Path
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import logging
 import time
-from app.core.models import Product, ProductResponse, ProductSearchParams
+import zlib
+from app.core.config import settings
+from app.core.models import (
+    FacetResponse,
+    Product,
+    ProductBatchResponse,
+    ProductResponse,
+    ProductSearchParams,
+    SuggestResponse
+)
 from app.core.metrics import (
     PRODUCT_SEARCHES, 
     PRODUCT_SEARCH_RESULTS,
     PRODUCT_VIEWS,
+    PRODUCT_VIEW_HITTERS,
+    PRODUCT_BATCH_SIZE,
     FILTER_USAGE,
     CATEGORY_VIEWS,
     SEARCH_LATENCY,
-    ZERO_RESULTS_SEARCHES
+    ZERO_RESULTS_SEARCHES,
+    LATENCY_TRACKER
 )
-from app.data.products import products
+from app.data.pagination import decode_cursor
+from app.data.payloads import dumps
+from app.data.repository import StaleCursor, create_repository
+from app.data.suggest import MAX_SUGGESTIONS
 
 router = APIRouter()
 logger = logging.getLogger("api")
 
-# Get unique categories, subcategories, and brands for filtering options
-CATEGORIES = sorted(list(set(p["category"] for p in products)))
-SUBCATEGORIES = sorted(list(set(p["subcategory"] for p in products)))
-BRANDS = sorted(list(set(p["brand"] for p in products)))
-COLORS = sorted(list(set(color for p in products for color in p["color"])))
+# Upper bound on ids accepted by a single batch lookup
+MAX_BATCH_SIZE = 500
+
+# Product IDs are signed 64-bit integers, as stored and serialized
+MIN_PRODUCT_ID, MAX_PRODUCT_ID = -2**63, 2**63 - 1
+
+# In-memory catalog or SQLite database, depending on DB_URL, cached per CACHE_URL
+repository = create_repository()
 
 @router.get("/", response_model=ProductResponse, summary="Search products")
 async def search_products(
@@ -34,8 +54,11 @@ async def search_products(
     color: Optional[str] = None,
     availability: Optional[bool] = None,
     min_rating: Optional[float] = Query(None, ge=0, le=5),
+    sort: Optional[Literal["price_asc", "price_desc", "rating_desc", "relevance"]] = None,
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0, le=settings.SEARCH_MAX_OFFSET),
+    cursor: Optional[str] = None,
+    include_total: bool = True
 ):
     """
     Search for products with various filters
@@ -49,13 +72,16 @@ async def search_products(
     - **color**: Filter by color
     - **availability**: Filter by product availability
     - **min_rating**: Minimum product rating (0-5)
+    - **sort**: Result order (price_asc, price_desc, rating_desc, or relevance to `query`); catalog order if omitted
     - **limit**: Maximum number of results to return
     - **offset**: Number of results to skip (for pagination)
+    - **cursor**: Opaque `next_cursor` from a previous page; resumes right after it
+    - **include_total**: Count all matches; disable for cheaper deep pagination
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # Track which category is being searched
-    search_category = category if category else "all"
+    search_category = _category_label(category) if category else "all"
     
     # Track if filters are being used
     has_filters = any([
@@ -75,7 +101,7 @@ async def search_products(
         FILTER_USAGE.labels(filter_type="text_query").inc()
     if category:
         FILTER_USAGE.labels(filter_type="category").inc()
-        CATEGORY_VIEWS.labels(category=category).inc()
+        CATEGORY_VIEWS.labels(category=_category_label(category)).inc()
     if subcategory:
         FILTER_USAGE.labels(filter_type="subcategory").inc()
     if brand:
@@ -104,18 +130,37 @@ async def search_products(
         min_rating=min_rating
     )
     
-    # Search products
-    results = _search_products(params)
+    # Decode the cursor to the last product already returned
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    if sort == "relevance" and not query:
+        raise HTTPException(status_code=400, detail="sort=relevance requires a query")
+    if sort:
+        FILTER_USAGE.labels(filter_type="sort").inc()
+    
+    # Fetch one page of matches from the catalog backend
+    try:
+        page = await repository.search(params, sort, after, offset, limit, include_total)
+    except StaleCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor: product no longer exists")
+    total = page.total
     
     # Track search performance (complexity based on number of filters used)
     search_complexity = "complex" if has_filters else "simple"
-    SEARCH_LATENCY.labels(complexity=search_complexity).observe(time.time() - start_time)
+    search_duration = time.perf_counter() - start_time
+    SEARCH_LATENCY.labels(complexity=search_complexity).observe(search_duration)
+    LATENCY_TRACKER.observe("search", search_complexity, search_duration)
     
     # Record the number of results
-    PRODUCT_SEARCH_RESULTS.observe(len(results))
+    if total is not None:
+        PRODUCT_SEARCH_RESULTS.observe(total)
     
     # Track searches with zero results
-    if len(results) == 0:
+    if total == 0 or (total is None and not cursor and offset == 0 and page.count == 0):
         if query:
             query_type = "text"
         elif category or subcategory:
@@ -124,67 +169,17 @@ async def search_products(
             query_type = "filter"
         ZERO_RESULTS_SEARCHES.labels(query_type=query_type).inc()
     
-    # Apply pagination
-    paginated_results = results[offset:offset + limit]
-    
-    # Convert to Pydantic models
-    product_models = [Product(**product) for product in paginated_results]
-    
-    return ProductResponse(
-        total=len(results),
-        results=product_models
+    # Assemble the response from cached, pre-validated product payloads
+    return Response(
+        b'{"total":' + dumps(total) + b',"results":' + page.results
+        + b',"next_cursor":' + dumps(page.next_cursor) + b"}",
+        media_type="application/json"
     )
 
 
-def _search_products(params: ProductSearchParams):
-    """
-    Search products based on provided parameters
-    """
-    results = products.copy()
-    
-    # Text search in name and description
-    if params.query:
-        query = params.query.lower()
-        results = [
-            p for p in results 
-            if query in p["name"].lower() or query in p["description"].lower()
-        ]
-    
-    # Filter by category
-    if params.category:
-        results = [p for p in results if p["category"].lower() == params.category.lower()]
-    
-    # Filter by subcategory
-    if params.subcategory:
-        results = [p for p in results if p["subcategory"].lower() == params.subcategory.lower()]
-    
-    # Filter by brand
-    if params.brand:
-        results = [p for p in results if p["brand"].lower() == params.brand.lower()]
-    
-    # Filter by price range
-    if params.min_price is not None:
-        results = [p for p in results if p["price"] >= params.min_price]
-    
-    if params.max_price is not None:
-        results = [p for p in results if p["price"] <= params.max_price]
-    
-    # Filter by color
-    if params.color:
-        results = [
-            p for p in results 
-            if any(params.color.lower() in c.lower() for c in p["color"])
-        ]
-    
-    # Filter by availability
-    if params.availability is not None:
-        results = [p for p in results if p["availability"] == params.availability]
-    
-    # Filter by minimum rating
-    if params.min_rating is not None:
-        results = [p for p in results if p["rating"] >= params.min_rating]
-    
-    return results
+def _category_label(category: str) -> str:
+    """Metric label for a user-supplied category, bounded to the known categories"""
+    return repository.category_label(category) or "other"
     
     
 @router.get("/categories", summary="Get available product categories")
@@ -192,7 +187,7 @@ async def get_categories():
     """Get all available product categories for filtering"""
     # Record category browsing metrics
     FILTER_USAGE.labels(filter_type="list_categories").inc()
-    return {"categories": CATEGORIES}
+    return {"categories": repository.categories()}
 
 
 @router.get("/subcategories", summary="Get available product subcategories")
@@ -202,10 +197,8 @@ async def get_subcategories(category: Optional[str] = None):
     FILTER_USAGE.labels(filter_type="list_subcategories").inc()
     if category:
         # Filter subcategories by category
-        CATEGORY_VIEWS.labels(category=category).inc()
-        filtered = [p["subcategory"] for p in products if p["category"].lower() == category.lower()]
-        return {"subcategories": sorted(list(set(filtered)))}
-    return {"subcategories": SUBCATEGORIES}
+        CATEGORY_VIEWS.labels(category=_category_label(category)).inc()
+    return {"subcategories": repository.subcategories(category)}
 
 
 @router.get("/brands", summary="Get available product brands")
@@ -213,7 +206,7 @@ async def get_brands():
     """Get all available product brands for filtering"""
     # Record brand browsing metrics
     FILTER_USAGE.labels(filter_type="list_brands").inc()
-    return {"brands": BRANDS}
+    return {"brands": repository.brands()}
 
 
 @router.get("/colors", summary="Get available product colors")
@@ -221,22 +214,144 @@ async def get_colors():
     """Get all available product colors for filtering"""
     # Record color browsing metrics
     FILTER_USAGE.labels(filter_type="list_colors").inc()
-    return {"colors": COLORS}
+    return {"colors": repository.colors()}
+
+
+@router.get("/suggest", response_model=SuggestResponse, summary="Autocomplete a search query")
+async def suggest(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)
+):
+    """
+    Completions for a partially typed query, best first
+
+    Product names, brands, categories, subcategories and frequent
+    description words with a word starting with **prefix**, weighted by
+    product rating. Served from a prefix index held in memory, so a
+    keystroke never scans the catalog.
+    """
+    FILTER_USAGE.labels(filter_type="suggest").inc()
+    return Response(
+        b'{"suggestions":' + repository.suggest(prefix, limit) + b"}",
+        media_type="application/json"
+    )
+
+
+@router.get("/export", summary="Stream every matching product")
+async def export_products(
+    params: ProductSearchParams = Depends(),
+    sort: Optional[Literal["price_asc", "price_desc", "rating_desc"]] = None,
+    export_format: Literal["ndjson", "json"] = Query("ndjson", alias="format"),
+    gzip: bool = False
+):
+    """
+    Stream all products matching the search filters in a single response
+
+    Accepts the same filters as product search, with no limit or paging.
+    **format** is `ndjson` (one product per line) or `json` (one array);
+    **gzip** compresses the stream (`Content-Encoding: gzip`). Products are
+    read in batches of `EXPORT_BATCH_SIZE` only as the client consumes
+    them, so memory stays flat however large the export.
+    """
+    FILTER_USAGE.labels(filter_type="export").inc()
+    logger.info(f"📦 Product export: format='{export_format}', sort='{sort}', gzip={gzip}")
+
+    media_type = "application/x-ndjson" if export_format == "ndjson" else "application/json"
+    headers = {"Content-Encoding": "gzip"} if gzip else None
+    return StreamingResponse(
+        _export_stream(repository.export(params, sort), export_format, gzip),
+        media_type=media_type,
+        headers=headers
+    )
+
+
+async def _export_stream(batches: AsyncIterator[List[bytes]], export_format: str, compress: bool) -> AsyncIterator[bytes]:
+    """Encode batches of product payloads as NDJSON or a JSON array, optionally gzipped"""
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    async def encode(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return await run_in_threadpool(compressor.compress, data)
+
+    separator = b"[" if export_format == "json" else b""
+    async for batch in batches:
+        if export_format == "ndjson":
+            data = await encode(b"\n".join(batch) + b"\n")
+        else:
+            data = await encode(separator + b",".join(batch))
+            separator = b","
+        # Each chunk is sent before the next batch is read, so a slow client slows the reads
+        if data:
+            yield data
+
+    tail = b""
+    if export_format == "json":
+        # An empty export still needs its opening bracket
+        tail = b"[]" if separator == b"[" else b"]"
+    data = await encode(tail)
+    if compressor is not None:
+        data += compressor.flush()
+    if data:
+        yield data
+
+
+@router.get("/facets", response_model=FacetResponse, summary="Get facet counts for a search")
+async def get_facets(params: ProductSearchParams = Depends()):
+    """
+    Count matching products per category, subcategory, brand, color,
+    availability and price bucket
+
+    Accepts the same filters as product search. Only values with at least
+    one match are listed, most frequent first.
+    """
+    FILTER_USAGE.labels(filter_type="facets").inc()
+    
+    total, counts = await repository.facets(params)
+    return FacetResponse(total=total, facets=counts)
+
+
+@router.get("/batch", response_model=ProductBatchResponse, summary="Get several products by ID")
+async def get_products_batch(ids: str = Query(..., description="Comma-separated product IDs, e.g. 1,2,3")):
+    """
+    Get several products in a single round trip
+    
+    Products are returned in the order requested; unknown IDs are listed in **missing**.
+    """
+    try:
+        product_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be a comma-separated list of integers")
+    if any(not MIN_PRODUCT_ID <= product_id <= MAX_PRODUCT_ID for product_id in product_ids):
+        raise HTTPException(status_code=422, detail="ids must be signed 64-bit integers")
+    if len(product_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_SIZE} ids per request")
+    
+    logger.info(f"🔍 Product batch request: {len(product_ids)} ids")
+    PRODUCT_BATCH_SIZE.observe(len(product_ids))
+    
+    results, missing = await repository.get_many(product_ids)
+    return Response(
+        b'{"results":' + results + b',"missing":' + dumps(missing) + b"}",
+        media_type="application/json"
+    )
 
 
 @router.get("/{product_id}", response_model=Product, summary="Get product details")
-async def get_product(product_id: int = Path(..., description="The ID of the product to retrieve")):
+async def get_product(product_id: int = Path(
+    ..., ge=MIN_PRODUCT_ID, le=MAX_PRODUCT_ID, description="The ID of the product to retrieve"
+)):
     """Get detailed information about a specific product by ID"""
     logger.info(f"🔍 Product details request: id={product_id}")
     
-    for product in products:
-        if product["id"] == product_id:
-            # Record metric for product view
-            PRODUCT_VIEWS.labels(
-                product_id=str(product_id),
-                category=product["category"]
-            ).inc()
-            return Product(**product)
+    product = await repository.get(product_id)
+    if product is not None:
+        payload, category = product
+        # Record metric for product view
+        PRODUCT_VIEWS.labels(category=category).inc()
+        PRODUCT_VIEW_HITTERS.add(product_id)
+        return Response(payload, media_type="application/json")
     
     logger.warning(f"❌ Product not found: id={product_id}")
     raise HTTPException(status_code=404, detail="Product not found")
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Application launcher
+
+Single process with auto-reload in development (``DEBUG=true`` and
+``WORKERS=1``), or several uvicorn worker processes in production. With
+more than one worker, Prometheus metrics are written to
+``PROMETHEUS_MULTIPROC_DIR`` so ``/metrics`` aggregates every worker. If
+that variable is already exported, its directory is prepared even for a
+single worker, since prometheus_client then requires it to exist.
+
+Usage:
+    python -m app.server [--workers 4] [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import os
+import shutil
+
+import uvicorn
+
+from app.core.config import settings
+
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+def _prepare_multiprocess_metrics(directory: str):
+    """
+    Point prometheus_client at a fresh shared directory
+
+    Must run before any worker imports prometheus_client, which picks its
+    value storage at import time.
+    """
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+    os.environ[MULTIPROC_ENV] = directory
+
+
+def run(workers: int = None, host: str = None, port: int = None):
+    workers = workers or settings.WORKERS
+    if MULTIPROC_ENV in os.environ:
+        _prepare_multiprocess_metrics(os.environ[MULTIPROC_ENV])
+    elif workers > 1:
+        _prepare_multiprocess_metrics(settings.PROMETHEUS_MULTIPROC_DIR)
+
+    uvicorn.run(
+        "app.main:app",
+        host=host or settings.HOST,
+        port=port or settings.PORT,
+        workers=workers,
+        # Reload is development-only and cannot be combined with workers
+        reload=settings.DEBUG and workers == 1,
+        # "auto" picks uvloop and httptools when they are installed
+        loop="auto",
+        http="auto",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: WORKERS)")
+    parser.add_argument("--host", default=None, help="bind address (default: HOST)")
+    parser.add_argument("--port", type=int, default=None, help="bind port (default: PORT)")
+    args = parser.parse_args()
+    run(workers=args.workers, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
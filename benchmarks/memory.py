@@ -0,0 +1,78 @@
+"""
+Bytes per product: plain dicts vs compact records, and the whole catalog
+
+Writes a generated catalog to a temporary NDJSON file and loads it back the
+way the app does with ``CATALOG_PATH``, once as plain dicts and once as
+``ProductRecord``s, measuring the Python and NumPy heap held by each list
+with tracemalloc. It then builds a full ``Catalog`` from each (records plus
+the text, bitmap, sorted, facet, ranking and suggestion indexes) and reports
+what the indexes add. The payload cache starts empty and is bounded
+separately by ``PAYLOAD_CACHE_MAX_BYTES``.
+
+Usage:
+    python -m benchmarks.memory [--products 100000]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from app.core.config import settings
+from app.data.catalog import Catalog
+from app.data.generator import read_catalog, write_catalog
+from app.data.records import compact
+
+
+def measure(load) -> int:
+    """Heap bytes still held by the object ``load()`` returns"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    products = load()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del products
+    return held
+
+
+def measure_catalog(path: str, compact_records: bool) -> int:
+    """Heap bytes held by a ``Catalog`` built from ``path``, indexes included"""
+    previous = settings.COMPACT_CATALOG
+    settings.COMPACT_CATALOG = compact_records
+    try:
+        return measure(lambda: Catalog(read_catalog(path)))
+    finally:
+        settings.COMPACT_CATALOG = previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.ndjson")
+        write_catalog(path, args.products, args.seed)
+        json_bytes = os.path.getsize(path)
+
+        dicts = measure(lambda: list(read_catalog(path)))
+        records = measure(lambda: compact(read_catalog(path)))
+        dict_catalog = measure_catalog(path, compact_records=False)
+        record_catalog = measure_catalog(path, compact_records=True)
+
+    n = args.products
+    print(f"{n} products, {json_bytes / n:.0f} bytes/product as JSON\n")
+    print(f"plain dicts:     {dicts / n:8.0f} bytes/product  ({dicts / 2**20:8.1f} MiB)")
+    print(f"compact records: {records / n:8.0f} bytes/product  ({records / 2**20:8.1f} MiB)")
+    print(f"reduction:       {dicts / records:8.1f}x\n")
+    print("whole catalog, indexes included:")
+    print(f"plain dicts:     {dict_catalog / n:8.0f} bytes/product  ({dict_catalog / 2**20:8.1f} MiB)")
+    print(f"compact records: {record_catalog / n:8.0f} bytes/product  ({record_catalog / 2**20:8.1f} MiB)")
+    print(f"indexes:         {(record_catalog - records) / n:8.0f} bytes/product")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Microbenchmarks for the hot paths, with regression thresholds
+
+Times the in-memory search (uncached, three filter mixes), ``get_product``,
+autocomplete, the metrics/tracing middleware overhead and a full ``/metrics`` render,
+reporting min / median / p99 per call in microseconds, against a generated
+catalog of ``--products`` items (app.data.generator). With ``--check`` the
+run fails when a median exceeds its threshold times ``--tolerance``.
+
+Usage:
+    python -m benchmarks.micro [--products 10000] [--rounds 2000] [--check]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from typing import Callable, Dict
+
+import numpy as np
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from prometheus_client import REGISTRY, generate_latest
+
+from app.core.middleware import setup_middleware
+from app.core.models import ProductSearchParams
+from app.data.catalog import catalog
+from app.data.generator import generate
+from app.data.memory import InMemoryRepository
+from app.routes.products import get_product
+from benchmarks.middleware import build_app, drive
+
+# Median microseconds per call at --products 10000 on a typical dev machine
+THRESHOLDS_US = {
+    "search: no filters": 50,
+    "search: text query": 2000,
+    "search: category+price+color": 400,
+    "get_product": 60,
+    "suggest: 1 char": 10,
+    "suggest: 5 chars": 50,
+    "middleware overhead": 200,
+    "/metrics render": 5000,
+}
+
+SEARCHES = {
+    "search: no filters": ProductSearchParams(),
+    "search: text query": ProductSearchParams(query="pro"),
+    "search: category+price+color": ProductSearchParams(
+        category="electronics", min_price=100, max_price=1500, color="black", availability=True
+    ),
+}
+
+
+def time_calls(fn: Callable[[], object], rounds: int) -> np.ndarray:
+    """Per-call seconds for ``rounds`` calls after a short warm-up"""
+    for _ in range(min(rounds, 100)):
+        fn()
+    times = np.empty(rounds)
+    for i in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def time_async_calls(fn: Callable[[], object], rounds: int) -> np.ndarray:
+    async def run():
+        for _ in range(min(rounds, 100)):
+            await fn()
+        times = np.empty(rounds)
+        for i in range(rounds):
+            start = time.perf_counter()
+            await fn()
+            times[i] = time.perf_counter() - start
+        return times
+
+    return asyncio.run(run())
+
+
+def run_benchmarks(rounds: int) -> Dict[str, np.ndarray]:
+    results = {}
+    for name, params in SEARCHES.items():
+        results[name] = time_calls(lambda: InMemoryRepository().select(params), rounds)
+    results["get_product"] = time_async_calls(lambda: get_product(1), rounds)
+    results["suggest: 1 char"] = time_calls(lambda: InMemoryRepository().suggest("s", 10), rounds)
+    results["suggest: 5 chars"] = time_calls(lambda: InMemoryRepository().suggest("noise", 10), rounds)
+
+    # Middleware cost is the difference of two averaged runs
+    requests = max(rounds, 2000)
+    bare = asyncio.run(drive(build_app(None), requests))
+    instrumented = asyncio.run(drive(build_app(setup_middleware), requests))
+    results["middleware overhead"] = np.array([instrumented - bare])
+
+    results["/metrics render"] = time_calls(lambda: generate_latest(REGISTRY), max(rounds // 10, 20))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000, help="generated catalog size")
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--check", action="store_true", help="exit 1 if a threshold is exceeded")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="multiplier applied to thresholds")
+    args = parser.parse_args()
+
+    logging.getLogger("api").disabled = True
+    trace.set_tracer_provider(TracerProvider())
+    catalog.load(list(generate(args.products)))
+    print(f"catalog: {len(catalog.products)} products\n")
+
+    failures = []
+    print(f"{'benchmark':<32} {'min us':>9} {'median us':>10} {'p99 us':>9} {'limit us':>9}")
+    for name, times in run_benchmarks(args.rounds).items():
+        low, median, p99 = np.percentile(times, [0, 50, 99]) * 1e6
+        limit = THRESHOLDS_US[name] * args.tolerance
+        flag = ""
+        if median > limit:
+            failures.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<32} {low:>9.1f} {median:>10.1f} {p99:>9.1f} {limit:>9.0f}{flag}")
+
+    if args.check and failures:
+        print(f"\n{len(failures)} benchmark(s) over threshold: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Per-request overhead of the metrics and tracing middleware
+
+Drives a minimal FastAPI app directly through its ASGI interface (no
+sockets, no HTTP client) and compares it with and without the middleware
+installed by ``setup_middleware``. Spans are recorded by an SDK tracer
+provider with no exporter attached, so export cost is excluded.
+
+``--baseline`` also measures the middleware as it was before the raw ASGI
+rewrite: an ``@app.middleware("http")`` function (``BaseHTTPMiddleware``)
+that runs the app in a separate task and re-streams the response, with
+per-request label lookups and span attributes set before the call.
+
+Usage:
+    python -m benchmarks.middleware [--requests 20000] [--baseline]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from typing import Callable, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+
+from app.core.middleware import ACTIVE_REQUESTS, LATENCY, REQUESTS, route_template, setup_middleware
+
+
+def setup_baseline_middleware(app: FastAPI):
+    """The metrics and tracing middleware before the raw ASGI rewrite, error handling omitted"""
+    tracer = trace.get_tracer(__name__)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.middleware("http")
+    async def metrics_and_tracing_middleware(request: Request, call_next):
+        method = request.method
+        if request.url.path == "/metrics":
+            return await call_next(request)
+        with tracer.start_as_current_span(name=method, kind=trace.SpanKind.SERVER) as span:
+            span.set_attribute("http.method", method)
+            span.set_attribute("http.url", str(request.url))
+            span.set_attribute("client.ip", request.client.host if request.client else "unknown")
+            ACTIVE_REQUESTS.inc()
+            start_time = time.time()
+            try:
+                response = await call_next(request)
+                endpoint = route_template(request.scope)
+                span.update_name(f"{method} {endpoint}")
+                span.set_attribute("http.route", endpoint)
+                span.set_attribute("http.status_code", response.status_code)
+                duration = time.time() - start_time
+                span.set_attribute("duration_ms", duration * 1000)
+                REQUESTS.labels(method=method, endpoint=endpoint).inc()
+                LATENCY.labels(method=method, endpoint=endpoint).observe(duration)
+                return response
+            finally:
+                ACTIVE_REQUESTS.dec()
+
+
+def build_app(setup: Optional[Callable[[FastAPI], None]]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    if setup is not None:
+        setup(app)
+    return app
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    """Average seconds per request for ``requests`` sequential GETs"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/items/1", "raw_path": b"/items/1",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 5000), "server": ("bench", 80),
+    }
+
+    async def send(message):
+        pass
+
+    async def request():
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Like a real server, block until the client disconnects (never)
+            await asyncio.Event().wait()
+
+        await app(dict(scope), receive, send)
+
+    # Warm up routing, label children and lazy imports
+    for _ in range(200):
+        await request()
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await request()
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--baseline", action="store_true", help="also measure the BaseHTTPMiddleware version")
+    args = parser.parse_args()
+
+    logging.getLogger("api").disabled = True
+    trace.set_tracer_provider(TracerProvider())
+
+    bare = asyncio.run(drive(build_app(None), args.requests))
+    instrumented = asyncio.run(drive(build_app(setup_middleware), args.requests))
+
+    print(f"bare app:        {bare * 1e6:8.1f} us/request")
+    print(f"with middleware: {instrumented * 1e6:8.1f} us/request")
+    print(f"overhead:        {(instrumented - bare) * 1e6:8.1f} us/request")
+    if args.baseline:
+        baseline = asyncio.run(drive(build_app(setup_baseline_middleware), args.requests))
+        print(f"\nbaseline (BaseHTTPMiddleware): {baseline * 1e6:8.1f} us/request")
+        print(f"baseline overhead:             {(baseline - bare) * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
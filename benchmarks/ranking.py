@@ -0,0 +1,91 @@
+"""
+Relevance ranking at catalog scale
+
+Builds the BM25F ``RelevanceIndex`` over ``--products`` generated items
+(1M by default; products are streamed, not held) and times ranked queries
+against the whole catalog and against a 10% filter selection, for the
+first page (top 10) and a deep page (top 100). The same scores ordered by
+a full sort are timed alongside to show what partial top-k selection saves.
+
+Usage:
+    python -m benchmarks.ranking [--products 1000000] [--queries 200]
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from app.data.bitmaps import Bitmap
+from app.data.generator import generate
+from app.data.ranking import RelevanceIndex, tokenize
+
+
+def sample_queries(count: int, seed: int) -> List[str]:
+    """One to three words from generated product names, the last sometimes cut short as if still typing"""
+    rng = random.Random(seed)
+    names = [tokenize(product["name"]) for product in generate(500, seed + 1)]
+    queries = []
+    for _ in range(count):
+        words = rng.choice(names)
+        start = rng.randrange(len(words))
+        query = words[start:start + rng.randint(1, 3)]
+        if rng.random() < 0.3 and len(query[-1]) > 3:
+            query[-1] = query[-1][:rng.randint(2, len(query[-1]) - 1)]
+        queries.append(" ".join(query))
+    return queries
+
+
+def full_sort(index: RelevanceIndex, query: str, selection: Bitmap, count: int) -> np.ndarray:
+    """Baseline: score every match, then order all of them"""
+    scored, scores = index.scores(query)
+    matching = selection.contains(scored)
+    scored, scores = scored[matching], scores[matching]
+    return scored[np.lexsort((scored, -scores))][:count]
+
+
+def time_queries(fn: Callable[[str], object], queries: List[str]) -> np.ndarray:
+    for query in queries[:10]:
+        fn(query)
+    times = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        fn(query)
+        times[i] = time.perf_counter() - start
+    return times * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = RelevanceIndex(generate(args.products, args.seed))
+    print(f"{args.products} products indexed in {time.perf_counter() - start:.1f}s, "
+          f"{index.nbytes / 2**20:.1f} MiB of postings\n")
+
+    queries = sample_queries(args.queries, args.seed)
+    rng = np.random.default_rng(args.seed)
+    selections = {
+        "all products": Bitmap.full(index.size),
+        "10% selection": Bitmap.from_mask(rng.random(index.size) < 0.1),
+    }
+
+    print(f"{'query':<34} {'median ms':>10} {'p99 ms':>9}")
+    for label, selection in selections.items():
+        for count in (10, 100):
+            for method, fn in (
+                ("top-k", lambda q: index.rank(q, selection, count)),
+                ("full sort", lambda q: full_sort(index, q, selection, count)),
+            ):
+                times = time_queries(fn, queries)
+                name = f"{label}, top {count}, {method}"
+                print(f"{name:<34} {np.median(times):>10.2f} {np.percentile(times, 99):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Replay recorded traffic against the app in-process
+
+Reads the JSON lines written by the request recorder (``REQUEST_LOG_PATH``,
+one file per worker process, merged in timestamp order), sends them to ``app.main:app`` through httpx's ASGI transport (no sockets,
+no server) with ``--concurrency`` requests in flight, and reports throughput
+and latency percentiles per endpoint. Lines without a ``method`` and
+``path`` are skipped.
+
+Usage:
+    REQUEST_LOG_PATH=requests.jsonl python -m app.server   # record to requests.<pid>.jsonl
+    python -m benchmarks.replay requests.*.jsonl [--concurrency 16] [--repeat 3]
+
+Set ``LOKI_ENABLED=false`` and ``TRACE_SAMPLE_RATIO=0`` to leave log
+shipping and span export out of the measurement.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+
+def load(path: str) -> List[dict]:
+    """Replayable requests from a recorder file"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and entry.get("method") and entry.get("path"):
+                entries.append(entry)
+    return entries
+
+
+async def replay(app, entries: List[dict], concurrency: int) -> Dict[str, List[float]]:
+    """Send every entry; returns latencies in seconds keyed by endpoint"""
+    latencies = defaultdict(list)
+    queue = asyncio.Queue()
+    for entry in entries:
+        queue.put_nowait(entry)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+
+        async def worker():
+            while not queue.empty():
+                entry = queue.get_nowait()
+                query = entry.get("query") or ""
+                url = entry["path"] + (f"?{query}" if query else "")
+                start = time.perf_counter()
+                response = await client.request(entry["method"], url)
+                await response.aread()
+                endpoint = entry.get("endpoint") or entry["path"]
+                latencies[f"{entry['method']} {endpoint}"].append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def report(latencies: Dict[str, List[float]], elapsed: float):
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)\n")
+    print(f"{'endpoint':<40} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'p999 ms':>8}")
+    for endpoint, values in sorted(latencies.items(), key=lambda item: -len(item[1])):
+        p50, p90, p99, p999 = np.percentile(values, [50, 90, 99, 99.9]) * 1000
+        print(f"{endpoint:<40} {len(values):>7} {len(values) / elapsed:>8.0f} "
+              f"{p50:>8.2f} {p90:>8.2f} {p99:>8.2f} {p999:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="recorded requests (JSON lines), one file per worker")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the file this many times")
+    args = parser.parse_args()
+
+    entries = sorted((entry for path in args.paths for entry in load(path)), key=lambda entry: entry.get("ts", 0))
+    entries *= args.repeat
+    if not entries:
+        parser.error(f"no replayable requests in {', '.join(args.paths)}")
+
+    # Import late so settings from the environment apply
+    from app.main import app
+
+    logging.getLogger("api").disabled = True
+    start = time.perf_counter()
+    latencies = asyncio.run(replay(app, entries, args.concurrency))
+    report(latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
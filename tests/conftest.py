@@ -0,0 +1,11 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One app lifespan per session: shutdown closes the module-level repository
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,50 @@
+"""
+Trigram text index: identical results to a substring scan
+"""
+import random
+
+import pytest
+
+from app.data import index as index_module
+from app.data.generator import generate
+from app.data.index import TextIndex
+
+
+def scan(products, query):
+    query = query.lower()
+    return [
+        position for position, product in enumerate(products)
+        if query in product["name"].lower() or query in product["description"].lower()
+    ]
+
+
+def random_products(count, rng):
+    alphabet = "abcAB é-ü"
+    def text(longest):
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, longest)))
+    return [{"name": text(6), "description": text(20)} for _ in range(count)]
+
+
+@pytest.mark.parametrize("chunk", [8, 64, 8192])
+def test_matches_substring_scan(monkeypatch, chunk):
+    monkeypatch.setattr(index_module, "_BUILD_CHUNK", chunk)
+    rng = random.Random(chunk)
+    products = random_products(300, rng)
+    index = TextIndex(products)
+
+    queries = {"a", "B", "é", "ü", "-", "zz", "\0"}
+    for product in rng.sample(products, 60):
+        text = product["name"] + " " + product["description"]
+        start = rng.randrange(len(text))
+        queries.add(text[start:start + rng.randint(1, 7)])
+    queries.update("".join(rng.choice("abé -") for _ in range(rng.randint(1, 6))) for _ in range(200))
+
+    for query in queries:
+        assert index.search(query).tolist() == scan(products, query), query
+
+
+def test_generated_catalog():
+    products = list(generate(2000, 3))
+    index = TextIndex(products)
+    for query in ["pro", "a", "wireless", "Noise Cancel", "xq", "ultra ", "with", ""]:
+        assert index.search(query).tolist() == scan(products, query), query
@@ -0,0 +1,65 @@
+"""
+Cursor decoding: forged or corrupted cursors are rejected with a 400, never a 500
+"""
+import base64
+import json
+
+import pytest
+
+from app.data.pagination import decode_cursor, encode_cursor
+
+
+def _cursor(data) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+MALFORMED = [
+    ({"s": None, "k": {}, "id": 1}, None),
+    ({"s": None, "k": 1.5, "id": 1}, None),
+    ({"s": "price_asc", "k": [1], "id": 1}, "price_asc"),
+    ({"s": "price_asc", "k": None, "id": 1}, "price_asc"),
+    ({"s": "price_asc", "k": True, "id": 1}, "price_asc"),
+    ({"s": "price_asc", "k": "1", "id": 1}, "price_asc"),
+    ({"s": "price_asc", "k": 10 ** 400, "id": 1}, "price_asc"),
+    ({"s": "relevance", "k": None, "id": 1}, "relevance"),
+    ({"s": "price_asc", "k": 1.0, "id": "1"}, "price_asc"),
+    ({"s": "price_asc", "k": 1.0, "id": 1.5}, "price_asc"),
+    ({"s": "price_asc", "k": 1.0, "id": True}, "price_asc"),
+    ({"s": None, "k": None, "id": 2 ** 63}, None),
+    ({"s": None, "k": None}, None),
+    ([1, 2], None),
+]
+
+
+@pytest.mark.parametrize("data, sort", MALFORMED)
+def test_malformed_cursor_raises_value_error(data, sort):
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        decode_cursor(_cursor(data), sort)
+
+
+@pytest.mark.parametrize("raw", ["not base64!", "", "e30", base64.urlsafe_b64encode(b'{"k":NaN,"s":"price_asc","id":1}').decode()])
+def test_undecodable_cursor_raises_value_error(raw):
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        decode_cursor(raw, "price_asc")
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("price_asc", 19.99, 7), "price_asc") == (19.99, 7)
+    assert decode_cursor(encode_cursor("rating_desc", 4, 7), "rating_desc") == (4.0, 7)
+    assert decode_cursor(encode_cursor(None, None, 7), None) == (None, 7)
+
+
+def test_cursor_for_other_sort_is_rejected():
+    with pytest.raises(ValueError, match="different sort order"):
+        decode_cursor(encode_cursor("price_asc", 1.0, 1), "price_desc")
+
+
+@pytest.mark.parametrize("data, sort", MALFORMED)
+def test_search_rejects_malformed_cursor(client, data, sort):
+    params = {"cursor": _cursor(data), "query": "pro"}
+    if sort:
+        params["sort"] = sort
+    response = client.get("/products/", params=params)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid cursor")
@@ -0,0 +1,22 @@
+"""
+Product JSON cache: bounded by its byte budget, same bytes cached or not
+"""
+from app.core.config import settings
+from app.data.generator import generate
+from app.data.payloads import PayloadCache, loads
+
+
+def test_payload_cache_stays_within_budget(monkeypatch):
+    monkeypatch.setattr(settings, "PAYLOAD_CACHE_MAX_BYTES", 64 * 1024)
+    products = list(generate(2000, 1))
+    payloads = PayloadCache(products)
+
+    for position in range(len(products)):
+        assert loads(payloads.get(position))["id"] == products[position]["id"]
+
+    assert 0 < len(payloads._cache) < len(products)
+    assert payloads._cache._bytes <= 64 * 1024
+    # The most recent products are cached, the first ones were evicted
+    assert payloads.cached(len(products) - 1) is not None
+    assert payloads.cached(0) is None
+    assert payloads.get(0) == payloads.encode(0)
@@ -0,0 +1,25 @@
+"""
+Product lookup routes: IDs outside the signed 64-bit range are rejected, not a 500
+"""
+import pytest
+
+
+@pytest.mark.parametrize("ids", ["99999999999999999999", "1,9223372036854775808", "-9223372036854775809"])
+def test_batch_rejects_ids_beyond_64_bits(client, ids):
+    response = client.get("/products/batch", params={"ids": ids})
+    assert response.status_code == 422
+
+
+def test_batch_lists_unknown_64_bit_ids_as_missing(client):
+    response = client.get("/products/batch", params={"ids": "1,9223372036854775807"})
+    assert response.status_code == 200
+    assert response.json()["missing"] == [9223372036854775807]
+
+
+@pytest.mark.parametrize("product_id", ["99999999999999999999", "-9223372036854775809"])
+def test_product_rejects_ids_beyond_64_bits(client, product_id):
+    assert client.get(f"/products/{product_id}").status_code == 422
+
+
+def test_unknown_product_is_404(client):
+    assert client.get("/products/9223372036854775807").status_code == 404
@@ -0,0 +1,46 @@
+"""
+Relevance ranking: cursors resume exactly after the last product returned
+"""
+import pytest
+
+from app.data.bitmaps import Bitmap
+from app.data.ranking import RelevanceIndex
+
+PRODUCTS = [
+    {"name": "Widget Pro", "brand": "Acme", "description": "A widget"},
+    {"name": "Gadget", "brand": "Acme", "description": "Not what you searched for"},
+    {"name": "Widget", "brand": "Other", "description": "Another one"},
+    {"name": "Gizmo", "brand": "Other", "description": "Also unrelated"},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return RelevanceIndex(PRODUCTS)
+
+
+def rank(index, after=None):
+    positions, scores = index.rank("widget", Bitmap.full(len(PRODUCTS)), 10, after)
+    return positions.tolist(), scores.tolist()
+
+
+def test_scored_first_then_unscored_in_catalog_order(index):
+    positions, scores = rank(index)
+    assert positions[2:] == [1, 3]
+    assert sorted(positions[:2]) == [0, 2]
+    assert scores[0] >= scores[1] > 0 and scores[2:] == [0, 0]
+
+
+def test_cursor_into_scored_products(index):
+    positions, scores = rank(index)
+    assert rank(index, (scores[0], positions[0]))[0] == positions[1:]
+
+
+def test_cursor_into_unscored_tail(index):
+    assert rank(index, (0.0, 1))[0] == [3]
+
+
+def test_negative_key_ranks_after_everything(index):
+    # Every product scores at least 0, so nothing follows a forged negative key
+    positions, scores = rank(index, (-1.0, 0))
+    assert positions == [] and scores == []
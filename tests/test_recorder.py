@@ -0,0 +1,25 @@
+"""
+Traffic recording: one file per process, replayable fields only
+"""
+import json
+import os
+
+from app.core.recorder import RequestRecorder, process_path
+
+
+def test_process_path():
+    assert process_path("traffic.jsonl", 42) == "traffic.42.jsonl"
+    assert process_path("/var/log/traffic", 42) == "/var/log/traffic.42"
+
+
+def test_records_to_a_per_process_file(tmp_path):
+    recorder = RequestRecorder(str(tmp_path / "traffic.jsonl"), flush_every=3)
+    for i in range(7):
+        recorder.record("GET", f"/products/{i}", "", "/products/{product_id}", 200, 0.001)
+    recorder.close()
+
+    assert os.listdir(tmp_path) == [f"traffic.{os.getpid()}.jsonl"]
+    with open(tmp_path / f"traffic.{os.getpid()}.jsonl", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry["path"] for entry in entries] == [f"/products/{i}" for i in range(7)]
+    assert set(entries[0]) == {"ts", "method", "path", "query", "endpoint", "status", "duration_ms"}
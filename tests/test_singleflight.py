@@ -0,0 +1,62 @@
+"""
+Request coalescing: one computation per key, isolated from callers' cancellation
+"""
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    async def main():
+        flight, calls = SingleFlight("test"), []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+        assert not flight._inflight
+
+    asyncio.run(main())
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    async def main():
+        flight, release = SingleFlight("test"), asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "value"
+
+        leader = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        assert await follower == "value"
+
+    asyncio.run(main())
+
+
+def test_exception_reaches_every_caller():
+    async def main():
+        flight = SingleFlight("test")
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert not flight._inflight
+
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+SQLite backend: safe concurrent first start, out-of-range IDs are missing
+"""
+import asyncio
+import multiprocessing
+import os
+
+import pytest
+
+from app.data.generator import generate
+from app.data.sqlite import SQLiteRepository, build_database
+
+
+@pytest.fixture(scope="module")
+def repository(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db") / "catalog.db")
+    build_database(path, generate(50, 1))
+    repository = SQLiteRepository(path)
+    yield repository
+    asyncio.run(repository.close())
+
+
+def test_ids_beyond_64_bits_are_missing(repository):
+    async def main():
+        assert await repository.get(2**63) is None
+        assert await repository.get(-2**64) is None
+        found = await repository.lookup([1, 2**63, 99999999999999999999])
+        assert list(found) == [1]
+        results, missing = await repository.get_many([2**70, 1])
+        assert missing == [2**70]
+
+    asyncio.run(main())
+
+
+def test_build_leaves_no_temporary_file(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    assert build_database(path, generate(20, 1)) == 20
+    assert sorted(os.listdir(tmp_path)) == ["catalog.db"]
+
+
+def _start_worker(path: str) -> int:
+    repository = SQLiteRepository(path)
+    try:
+        product = asyncio.run(repository.get(1))
+        return 0 if product is not None else 1
+    finally:
+        asyncio.run(repository.close())
+
+
+def test_concurrent_workers_build_once(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        assert pool.map(_start_worker, [path] * 4) == [0, 0, 0, 0]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".building")]
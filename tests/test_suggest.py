@@ -0,0 +1,47 @@
+"""
+Autocomplete: best completions of every word start, valid JSON
+"""
+import json
+import re
+
+from app.data.generator import generate
+from app.data.suggest import KINDS, SuggestIndex, suggestion_entries
+
+
+def scan(entries, prefix, limit):
+    best = {}
+    for entry in entries:
+        key = " ".join(entry[0].lower().split())
+        current = best.get(key)
+        if current is None or (KINDS.index(entry[1]), -entry[3]) < (KINDS.index(current[1]), -current[3]):
+            best[key] = entry
+    word_starts = re.compile(r"(?<![\w'’])\w")
+    matches = sorted(
+        (key for key in best if any(key[m.start():].startswith(prefix) for m in word_starts.finditer(key))),
+        key=lambda key: (-best[key][3], key),
+    )
+    return [{"text": best[key][0], "type": best[key][1], "id": best[key][2]} for key in matches[:limit]]
+
+
+def test_matches_scan():
+    entries = suggestion_entries(generate(1000, 7))
+    index = SuggestIndex(entries)
+    for prefix in ["s", "so", "pro", "noise", "wireless hea", "zzz", "é"]:
+        for limit in (1, 5, 20):
+            assert json.loads(index.suggest(prefix, limit)) == scan(entries, prefix, limit), (prefix, limit)
+
+
+def test_escapes_and_unicode():
+    index = SuggestIndex([
+        ('The "Über" Lamp', "product", 2**62, 4.5),
+        ("Über", "brand", None, 9.0),
+        ("über", "term", None, 1.0),
+    ])
+    assert len(index) == 2
+    assert json.loads(index.suggest("  ÜB ", 10)) == [
+        {"text": "Über", "type": "brand", "id": None},
+        {"text": 'The "Über" Lamp', "type": "product", "id": 2**62},
+    ]
+    assert json.loads(index.suggest("lamp", 10))[0]["text"] == 'The "Über" Lamp'
+    assert index.suggest("", 10) == b"[]"
+    assert index.suggest("x", 10) == b"[]"
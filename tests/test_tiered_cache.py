@@ -0,0 +1,31 @@
+"""
+Two-tier cache: clearing forgets values in both tiers
+"""
+import asyncio
+
+from app.core.tiered_cache import SQLiteCache, TieredCache
+
+
+def test_clear_forgets_both_tiers(tmp_path):
+    async def main():
+        shared = SQLiteCache(str(tmp_path / "cache.db"))
+        cache = TieredCache("test_clear", shared, max_bytes=1 << 20, ttl_seconds=60, prefix="test")
+        cache.set_many({"a": b"old"}, 0.0)
+        await cache.flush()
+
+        # A second process still reads the shared value
+        other = TieredCache("test_clear", shared, max_bytes=1 << 20, ttl_seconds=60, prefix="test")
+        assert await other.get_many(["a"]) == {"a": b"old"}
+
+        cache.clear()
+        assert await cache.get_many(["a"]) == {}
+
+        async def compute():
+            return b"new"
+
+        assert await cache.fetch("a", compute) == b"new"
+        await cache.flush()
+        assert await cache.get_many(["a"]) == {"a": b"new"}
+        await shared.close()
+
+    asyncio.run(main())